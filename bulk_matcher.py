@@ -0,0 +1,284 @@
+"""Partitioned, multi-process lot matcher for full MLS feeds.
+
+Usage:
+    python bulk_matcher.py [--workers N] [--output MatchingSummary.bulk.csv] [CSV ...]
+
+``lot_lookup`` issues a query cascade per address, which is fine for a golden
+set but not for tens of thousands of listings. The bulk engine instead:
+
+1. partitions listings by ZIP (explicit, or inferred from the ZIP gazetteer)
+   and falls back to the city when no ZIP is known;
+2. streams each ZIP partition's lots once through a server-side cursor
+   (``zip = %s``), keeping only lots whose house number occurs in the
+   partition;
+3. serves all city partitions from a single sequential scan of ``lots``,
+   routing each row to the city whose tokens end its formatted address (so
+   "Mound" does not pick up "Mounds View");
+4. hash-joins listings to lots on (house number, significant street token) and
+   scores the joined candidates with the improved-mode scorer;
+5. spreads the ZIP partitions and the city scan across a process pool.
+
+Without a ZIP gazetteer every portal listing lands in a city partition and the
+run is one full scan of ``lots``; the summary reports how many partitions and
+listings took that path. Output has the MatchingSummary.csv schema with
+``mode`` set to ``bulk``; a throughput summary (listings/s overall and per
+core) is printed at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+import lot_matching
+from listing_records import Listing, iter_listings
+
+
+BULK_MODE = "bulk"
+BULK_FETCH_SIZE = 5_000
+DOWNLOAD_DIR = Path("downloads")
+DEFAULT_OUTPUT = Path("MatchingSummary.bulk.csv")
+NO_STREET_TOKEN = ""
+
+# (listing index, address, city)
+PartitionListing = tuple[int, str, str]
+
+
+def log(message: str):
+    print(f"[bulk] {message}")
+
+
+def house_number_of(text: str | None) -> str | None:
+    tokens = lot_matching.tokenize(text)
+    return tokens[0] if tokens and tokens[0][:1].isdigit() else None
+
+
+def listing_join_keys(address: str) -> list[tuple[str, str]]:
+    number = house_number_of(address)
+    if not number:
+        return []
+    tokens = lot_matching.significant_street_tokens(lot_matching.extract_street_tokens(address))
+    return [(number, token) for token in tokens] or [(number, NO_STREET_TOKEN)]
+
+
+def lot_join_keys(formatted: str) -> list[tuple[str, str]]:
+    tokens = lot_matching.remove_unit_tokens(lot_matching.tokenize(formatted))
+    if not tokens or not tokens[0][:1].isdigit():
+        return []
+    number = tokens[0]
+    significant = lot_matching.significant_street_tokens(tokens[1:])
+    return [(number, token) for token in significant] + [(number, NO_STREET_TOKEN)]
+
+
+def partition_key(listing: Listing) -> list[tuple[str, str]]:
+    zips = lot_matching.infer_zip_codes(listing)
+    if zips:
+        return [("zip", zip_code) for zip_code in zips]
+    variants = lot_matching.city_variants(listing.city)
+    # min() so "St Louis Park" and "Saint Louis Park" share one partition.
+    return [("city", min(variants))] if variants else []
+
+
+def partition_listings(listings: list[Listing]) -> dict[tuple[str, str], list[PartitionListing]]:
+    partitions: dict[tuple[str, str], list[PartitionListing]] = defaultdict(list)
+    for index, listing in enumerate(listings):
+        for key in partition_key(listing):
+            partitions[key].append((index, listing.address, listing.city))
+    return partitions
+
+
+def stream_lots(sql: str, params: list, cursor_name: str):
+    with lot_matching.get_db_client().connect() as conn:
+        with conn.cursor(name=cursor_name) as cur:
+            cur.itersize = BULK_FETCH_SIZE
+            cur.execute(sql, params)
+            yield from cur
+
+
+class PartitionJoin:
+    """Hash join of one partition's listings against the lots streamed past it."""
+
+    def __init__(self, members: list[PartitionListing]):
+        self.members = members
+        self.wanted: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for position, (_, address, _) in enumerate(members):
+            for join_key in listing_join_keys(address):
+                self.wanted[join_key].append(position)
+        self.numbers = {number for number, _ in self.wanted}
+        self.candidates: dict[int, list[dict[str, Any]]] = defaultdict(list)
+
+    def offer(self, row: dict[str, Any], keys: list[tuple[str, str]]) -> None:
+        if not keys or keys[0][0] not in self.numbers:
+            return
+        joined: set[int] = set()
+        for join_key in keys:
+            joined.update(self.wanted.get(join_key, ()))
+        for position in joined:
+            self.candidates[position].append(dict(row))
+
+    def results(self) -> list[tuple[int, str | None, float | None]]:
+        results = []
+        for position, (index, address, city) in enumerate(self.members):
+            match = lot_matching.best_improved_match(
+                address, city, self.candidates.get(position, ())
+            )
+            if match:
+                results.append((index, match.get("formatted_address"), match["match_score"]))
+            else:
+                results.append((index, None, None))
+        return results
+
+
+def match_partition(
+    key: tuple[str, str],
+    members: list[PartitionListing],
+) -> tuple[list[tuple[int, str | None, float | None]], float, int]:
+    """Worker: join one ZIP partition's listings to its lots; returns results, CPU s, lots read."""
+
+    cpu_started = time.process_time()
+    join = PartitionJoin(members)
+    lots_read = 0
+    for row in stream_lots("SELECT * FROM lots WHERE zip = %s", [key[1]], "bulk_zip"):
+        lots_read += 1
+        formatted = row.get("formatted_address")
+        if formatted:
+            join.offer(row, lot_join_keys(formatted))
+    return join.results(), time.process_time() - cpu_started, lots_read
+
+
+def lot_city_tokens(formatted: str) -> list[str]:
+    """Tokens before the ``, MN <zip>`` tail, where the (undelimited) city ends."""
+
+    return lot_matching.tokenize(formatted.rsplit(",", 1)[0])
+
+
+def match_city_partitions(
+    partitions: dict[tuple[str, str], list[PartitionListing]],
+) -> tuple[list[tuple[int, str | None, float | None]], float, int]:
+    """Worker: serve every city partition from one sequential scan of ``lots``."""
+
+    cpu_started = time.process_time()
+    joins: dict[tuple[str, ...], PartitionJoin] = {}
+    for (_, city), members in partitions.items():
+        join = PartitionJoin(members)
+        for variant in lot_matching.city_variants(city):
+            joins[tuple(variant.split())] = join
+    longest = max((len(tokens) for tokens in joins), default=0)
+
+    lots_read = 0
+    for row in stream_lots("SELECT * FROM lots", [], "bulk_city_scan"):
+        lots_read += 1
+        formatted = row.get("formatted_address")
+        if not formatted:
+            continue
+        tokens = lot_city_tokens(formatted)
+        # Whole-token suffix match: the longest city that ends the address wins.
+        for size in range(min(longest, len(tokens) - 1), 0, -1):
+            join = joins.get(tuple(tokens[-size:]))
+            if join is not None:
+                join.offer(row, lot_join_keys(formatted))
+                break
+
+    results = [result for join in dict.fromkeys(joins.values()) for result in join.results()]
+    return results, time.process_time() - cpu_started, lots_read
+
+
+def run_bulk(listings: list[Listing], workers: int) -> tuple[list[tuple], dict[str, Any]]:
+    partitions = partition_listings(listings)
+    partitioned = {index for members in partitions.values() for index, _, _ in members}
+    unpartitioned = len(listings) - len(partitioned)
+    zip_partitions = {key: members for key, members in partitions.items() if key[0] == "zip"}
+    city_partitions = {key: members for key, members in partitions.items() if key[0] == "city"}
+    city_listings = sum(len(members) for members in city_partitions.values())
+    log(
+        f"run_bulk: {len(listings)} listing(s) in {len(partitions)} partition(s)"
+        f" ({unpartitioned} without ZIP or city) on {workers} worker(s)."
+    )
+    if city_partitions:
+        log(
+            f"run_bulk: {len(city_partitions)} city partition(s) ({city_listings} listing(s))"
+            " have no ZIP and share one full scan of lots; build the ZIP gazetteer to avoid it."
+        )
+
+    best: dict[int, tuple[str | None, float]] = {}
+    cpu_seconds = 0.0
+    lots_read = 0
+    started = time.perf_counter()
+    ordered = sorted(zip_partitions.items(), key=lambda item: len(item[1]), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        if city_partitions:
+            # Submitted first: the full scan is the longest job.
+            futures[pool.submit(match_city_partitions, city_partitions)] = ("city", "*")
+        for key, members in ordered:
+            futures[pool.submit(match_partition, key, members)] = key
+        for future in as_completed(futures):
+            results, cpu, lots = future.result()
+            cpu_seconds += cpu
+            lots_read += lots
+            for index, formatted, score in results:
+                if score is not None and score > best.get(index, (None, -1.0))[1]:
+                    best[index] = (formatted, score)
+            log(
+                f"run_bulk: partition {futures[future]} done"
+                f" ({len(results)} listing(s), {lots} lot(s))."
+            )
+    wall = time.perf_counter() - started
+
+    rows = []
+    for index, listing in enumerate(listings):
+        formatted, score = best.get(index, ("", None))
+        rows.append((BULK_MODE, listing.json_address, formatted or "", score))
+    rows.sort(key=lambda item: item[3] if item[3] is not None else -1)
+
+    stats = {
+        "listings": len(listings),
+        "matched": len(best),
+        "partitions": len(partitions),
+        "zip_partitions": len(zip_partitions),
+        "city_scan_partitions": len(city_partitions),
+        "city_scan_listings": city_listings,
+        "lots_read": lots_read,
+        "workers": workers,
+        "wall_seconds": round(wall, 3),
+        "listings_per_second": round(len(listings) / wall, 2) if wall else None,
+        "listings_per_second_per_core": round(len(listings) / wall / workers, 2) if wall else None,
+        "listings_per_cpu_second": round(len(listings) / cpu_seconds, 2) if cpu_seconds else None,
+    }
+    return rows, stats
+
+
+def write_summary(rows: list[tuple], output_path: Path) -> None:
+    with output_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["mode", "json_address", "lots_table_match", "match_score"])
+        for mode, json_address, formatted, score in rows:
+            writer.writerow(
+                [mode, json_address, formatted, "" if score is None else f"{score:.4f}"]
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_paths", nargs="*", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    csv_paths = args.csv_paths or sorted(DOWNLOAD_DIR.glob("AUTO_SEARCH_V1*.csv"))
+    listings = list(iter_listings(csv_paths))
+    rows, stats = run_bulk(listings, max(1, args.workers))
+    write_summary(rows, args.output)
+    log(f"main: wrote {len(rows)} rows to {args.output}")
+    for name, value in stats.items():
+        log(f"main: {name} = {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Optional Parquet output layer for listing exports and match summaries.
+
+Listings are written with typed numeric columns (Price, Beds, Baths, Square
+Footage, Lot Size) under ``<root>/listings/run_id=<id>/county=<COUNTY>/`` and
+match results under ``<root>/matches/run_id=<id>/mode=<mode>/``. Every write
+adds a new part file, so runs and counties append without rewriting earlier
+data. Eval statistics (the fields of ``MatchingSummary.*.eval.json``) are
+computed with vectorized pyarrow scans.
+
+Requires ``pyarrow`` (``pip install pyarrow``), which is only imported on the
+first write or scan; the callers in the repo only write when
+COLUMNAR_OUTPUT_DIR is set.
+
+Usage:
+    python columnar_store.py ingest downloads/AUTO_SEARCH_V1*_1_25_26.csv
+    python columnar_store.py eval --mode improved [--run-id RUN_ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Iterable
+
+from listing_records import parse_number
+
+
+COLUMNAR_OUTPUT_DIR = os.environ.get("COLUMNAR_OUTPUT_DIR")
+DEFAULT_COLUMNAR_ROOT = Path(COLUMNAR_OUTPUT_DIR or "columnar")
+COUNTY_PATTERN = re.compile(r"AUTO_SEARCH_V1([A-Z]+)_")
+
+
+def log(message: str):
+    print(f"[columnar] {message}")
+
+
+pa = pc = ds = None
+
+
+def require_pyarrow() -> None:
+    """Import pyarrow on first use so importing this module stays cheap."""
+
+    global pa, pc, ds
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("columnar_store: pyarrow is required (pip install pyarrow)") from exc
+    pa, pc, ds = pyarrow, pyarrow.compute, pyarrow.dataset
+
+
+def columnar_enabled() -> bool:
+    return bool(COLUMNAR_OUTPUT_DIR)
+
+
+def county_from_path(path: Path) -> str:
+    match = COUNTY_PATTERN.search(path.name)
+    return match.group(1) if match else "UNKNOWN"
+
+
+def listing_schema():
+    require_pyarrow()
+    return pa.schema(
+        [
+            ("MLS #", pa.string()),
+            ("Status", pa.string()),
+            ("Price", pa.float64()),
+            ("Address", pa.string()),
+            ("City", pa.string()),
+            ("Property Type", pa.string()),
+            ("Beds", pa.float32()),
+            ("Baths", pa.float32()),
+            ("Square Footage", pa.float64()),
+            ("Lot Size", pa.float64()),
+            ("Price per/Sqft", pa.float64()),
+        ]
+    )
+
+
+def match_schema():
+    require_pyarrow()
+    return pa.schema(
+        [
+            ("json_address", pa.string()),
+            ("lots_table_match", pa.string()),
+            ("match_score", pa.float64()),
+        ]
+    )
+
+
+NUMERIC_LISTING_FIELDS = ("Price", "Beds", "Baths", "Square Footage", "Lot Size", "Price per/Sqft")
+
+
+def listings_table(rows: Iterable[dict[str, Any]]):
+    schema = listing_schema()
+    columns: dict[str, list] = {name: [] for name in schema.names}
+    for row in rows:
+        for name in schema.names:
+            value = row.get(name)
+            if name in NUMERIC_LISTING_FIELDS:
+                value = value if isinstance(value, (int, float)) or value is None else parse_number(value)
+            else:
+                value = (value or "").strip() or None
+            columns[name].append(value)
+    return pa.table(columns, schema=schema)
+
+
+def matches_table(results: Iterable[tuple[str, str, float | None]]):
+    schema = match_schema()
+    columns: dict[str, list] = {name: [] for name in schema.names}
+    for json_address, formatted, score in results:
+        columns["json_address"].append(json_address)
+        columns["lots_table_match"].append(formatted or None)
+        columns["match_score"].append(score)
+    return pa.table(columns, schema=schema)
+
+
+def write_partition(
+    table,
+    root: Path,
+    dataset: str,
+    partitions: dict[str, str],
+    replace: bool = False,
+) -> Path:
+    """Append ``table`` as a new part file under ``root/dataset/key=value/...``.
+
+    With ``replace`` the partition's existing part files are removed first.
+    """
+
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    target = root / dataset
+    for key, value in partitions.items():
+        target = target / f"{key}={value}"
+    target.mkdir(parents=True, exist_ok=True)
+    if replace:
+        for stale in target.glob("part-*.parquet"):
+            stale.unlink()
+    part_path = target / f"part-{uuid.uuid4().hex}.parquet"
+    pq.write_table(table, part_path)
+    log(f"write_partition: Wrote {table.num_rows} row(s) to {part_path}.")
+    return part_path
+
+
+def write_listings(
+    rows: Iterable[dict[str, Any]],
+    run_id: str,
+    county: str,
+    root: Path = DEFAULT_COLUMNAR_ROOT,
+) -> Path:
+    return write_partition(
+        listings_table(rows), root, "listings", {"run_id": run_id, "county": county}
+    )
+
+
+def write_matches(
+    results: Iterable[tuple[str, str, float | None]],
+    run_id: str,
+    mode: str,
+    root: Path = DEFAULT_COLUMNAR_ROOT,
+    replace: bool = False,
+) -> Path:
+    return write_partition(
+        matches_table(results), root, "matches", {"run_id": run_id, "mode": mode}, replace
+    )
+
+
+def open_dataset(root: Path, dataset: str):
+    require_pyarrow()
+    return ds.dataset(root / dataset, format="parquet", partitioning="hive")
+
+
+def compute_eval(
+    mode: str,
+    run_id: str | None = None,
+    root: Path = DEFAULT_COLUMNAR_ROOT,
+) -> dict[str, Any]:
+    """Vectorized equivalent of the hand-derived ``.eval.json`` statistics."""
+
+    dataset = open_dataset(root, "matches")
+    condition = ds.field("mode") == mode
+    if run_id:
+        condition = condition & (ds.field("run_id") == run_id)
+    scores = dataset.to_table(columns=["match_score"], filter=condition)["match_score"]
+    total = len(scores)
+    matched = total - scores.null_count
+    summary: dict[str, Any] = {
+        "total": total,
+        "matched": matched,
+        "unmatched": total - matched,
+        "match_rate": round(matched / total, 4) if total else 0.0,
+    }
+    if matched:
+        min_max = pc.min_max(scores)
+        summary.update(
+            {
+                "mean_score": round(pc.mean(scores).as_py(), 4),
+                "median_score": round(
+                    pc.quantile(scores, q=0.5, interpolation="midpoint")[0].as_py(), 4
+                ),
+                "min_score": round(min_max["min"].as_py(), 4),
+                "max_score": round(min_max["max"].as_py(), 4),
+            }
+        )
+    return summary
+
+
+def read_csv_rows(csv_path: Path) -> list[dict[str, str]]:
+    with csv_path.open("r", newline="", encoding="utf-8-sig") as source_file:
+        return list(csv.DictReader(source_file))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=DEFAULT_COLUMNAR_ROOT)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest")
+    ingest_parser.add_argument("csv_paths", nargs="+", type=Path)
+    ingest_parser.add_argument("--run-id", default=None)
+    eval_parser = subparsers.add_parser("eval")
+    eval_parser.add_argument("--mode", required=True)
+    eval_parser.add_argument("--run-id", default=None)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        run_id = args.run_id or uuid.uuid4().hex[:12]
+        for csv_path in args.csv_paths:
+            write_listings(read_csv_rows(csv_path), run_id, county_from_path(csv_path), args.root)
+        return
+
+    print(json.dumps(compute_eval(args.mode, args.run_id, args.root), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
+import threading
+import time
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Generator, Iterable, Sequence
 
 import psycopg2
+from psycopg2.errors import InvalidSqlStatementName
 from psycopg2.extensions import connection as PGConnection
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
 
 logging.basicConfig(level=logging.INFO)
@@ -28,21 +34,57 @@ class DatabaseConfig:
 @dataclass
 class DatabaseClient:
     config: DatabaseConfig
+    _pool: ThreadedConnectionPool | None = field(default=None, init=False, repr=False)
+    # id(connection) -> names PREPAREd on that pooled connection's session.
+    _prepared: dict[int, set[str]] = field(default_factory=dict, init=False, repr=False)
+    # (statement name, "prepared" | "unprepared") -> [calls, total seconds]
+    _timings: dict[tuple[str, str], list] = field(default_factory=dict, init=False, repr=False)
+    _timings_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def connection_kwargs(self) -> dict:
+        return {
+            "host": self.config.host,
+            "port": self.config.port,
+            "user": self.config.user,
+            "password": self.config.password,
+            "dbname": self.config.database,
+            "sslmode": "require",
+            "cursor_factory": RealDictCursor,
+        }
+
+    def enable_pool(self, minconn: int = 1, maxconn: int = 4) -> None:
+        """Keep connections open between queries (for long-lived processes)."""
+
+        if self._pool is not None:
+            return
+        LOGGER.info("Opening connection pool (%s-%s) to %s", minconn, maxconn, self.config.host)
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **self.connection_kwargs())
+
+    def close_pool(self) -> None:
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            self._prepared.clear()
 
     @contextmanager
     def connect(self) -> Generator[PGConnection, None, None]:
+        if self._pool is not None:
+            conn = self._pool.getconn()
+            try:
+                yield conn
+            finally:
+                # Never hand an open transaction to the next borrower.
+                if not conn.closed:
+                    conn.rollback()
+                if conn.closed:
+                    self._prepared.pop(id(conn), None)
+                self._pool.putconn(conn, close=bool(conn.closed))
+            return
+
         conn: PGConnection | None = None
         try:
             LOGGER.debug("Opening database connection to %s", self.config.host)
-            conn = psycopg2.connect(
-                host=self.config.host,
-                port=self.config.port,
-                user=self.config.user,
-                password=self.config.password,
-                dbname=self.config.database,
-                sslmode="require",
-                cursor_factory=RealDictCursor,
-            )
+            conn = psycopg2.connect(**self.connection_kwargs())
             yield conn
         finally:
             if conn is not None:
@@ -56,6 +98,74 @@ class DatabaseClient:
                     return cur.fetchall()
                 return []
 
+    def query_prepared(self, sql: str, params: Sequence, prepare: bool = True) -> Iterable[dict]:
+        """Run ``sql`` as a named server-side prepared statement.
+
+        Statements are PREPAREd once per pooled connection and then EXECUTEd by
+        name, so repeated shapes skip parse and plan. Without a pool every
+        query gets a fresh connection and preparing would only add a round
+        trip, so the plain path is used instead (as it is for ``prepare=False``,
+        which benchmarks use for the unprepared baseline).
+        """
+
+        name = statement_name(sql)
+        with self.connect() as conn:
+            with conn.cursor() as cur:
+                # Both paths are timed over execute + fetch on an already borrowed
+                # connection; checkout, PREPARE and release are not part of either.
+                if self._pool is None or not prepare:
+                    started = time.perf_counter()
+                    cur.execute(sql, params)
+                    rows = cur.fetchall() if cur.description else []
+                    self.record_timing(name, "unprepared", time.perf_counter() - started)
+                    return rows
+
+                prepared = self._prepared.setdefault(id(conn), set())
+                if name not in prepared:
+                    self._prepare(cur, name, sql)
+                    prepared.add(name)
+                placeholders = ", ".join(["%s"] * len(params))
+                execute_sql = f"EXECUTE {name} ({placeholders})"
+                started = time.perf_counter()
+                try:
+                    cur.execute(execute_sql, params)
+                except InvalidSqlStatementName:
+                    # The session lost the statement (e.g. DISCARD ALL); prepare again.
+                    conn.rollback()
+                    self._prepare(cur, name, sql)
+                    started = time.perf_counter()
+                    cur.execute(execute_sql, params)
+                rows = cur.fetchall() if cur.description else []
+                self.record_timing(name, "prepared", time.perf_counter() - started)
+                return rows
+
+    def _prepare(self, cur, name: str, sql: str) -> None:
+        started = time.perf_counter()
+        cur.execute(f"PREPARE {name} AS {to_positional(sql)}")
+        self.record_timing(name, "prepare", time.perf_counter() - started)
+
+    def record_timing(self, name: str, kind: str, elapsed: float) -> None:
+        with self._timings_lock:
+            entry = self._timings.setdefault((name, kind), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def timing_report(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Per statement: call count and mean milliseconds for each execution path.
+
+        ``prepare`` is the one-off PREPARE cost, kept apart from ``prepared``
+        (EXECUTE + fetch) and ``unprepared`` (plain execute + fetch).
+        """
+
+        report: dict[str, dict[str, dict[str, float]]] = {}
+        with self._timings_lock:
+            for (name, kind), (calls, total) in sorted(self._timings.items()):
+                report.setdefault(name, {})[kind] = {
+                    "calls": calls,
+                    "mean_ms": round(total / calls * 1000, 3),
+                }
+        return report
+
     def query_value(self, sql: str, params: Sequence | None = None):
         results = self.query(sql, params)
         if not results:
@@ -64,6 +174,17 @@ class DatabaseClient:
         return next(iter(row.values()))
 
 
+def statement_name(sql: str) -> str:
+    return "stmt_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+
+
+def to_positional(sql: str) -> str:
+    """Rewrite psycopg2 ``%s`` placeholders as PREPARE-style ``$1, $2, ...``."""
+
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", sql)
+
+
 def main() -> None:
     client = DatabaseClient(DatabaseConfig())
     LOGGER.info("Connected. Running health check query...")
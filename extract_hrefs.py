@@ -1,16 +1,52 @@
+import argparse
 import asyncio
+import codecs
 import csv
 import json
 import os
-import re
-from difflib import SequenceMatcher
+import time
 from pathlib import Path
-from typing import Any
 from traceback import format_exc
 
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-
-from database_client import DatabaseClient, DatabaseConfig
+import columnar_store
+from listing_records import Listing, iter_listings
+from lot_matching import (  # noqa: F401 - re-exported for existing callers
+    DIRECTION_TOKENS,
+    LOT_LOOKUP_LIMIT,
+    LOT_MATCH_MODE,
+    LOT_MATCH_THRESHOLD,
+    STREET_TYPE_TOKENS,
+    UNIT_TOKENS,
+    ZIP_GAZETTEER_PATH,
+    build_db_house_number,
+    build_detail_tokens_from_text,
+    city_variants,
+    extract_house_number_from_text,
+    extract_postal_code,
+    extract_street_tokens,
+    extract_zip_from_text,
+    fetch_lot_candidates,
+    fetch_number_zip_candidates,
+    get_db_client,
+    get_zip_gazetteer,
+    infer_zip_codes,
+    lot_lookup,
+    make_like_fragment,
+    make_number_fragment,
+    match_number_zip,
+    normalize_address,
+    normalize_for_match,
+    number_zip_lot_lookup,
+    query_lot_candidates,
+    remove_unit_tokens,
+    significant_street_tokens,
+    split_street_components,
+    strip_trailing_state_tokens,
+    strip_unit_tokens,
+    tokenize,
+)
+from match_results_sink import MatchResultsSink, new_run_id, sink_enabled
+from run_checkpoint import CHECKPOINT_DIR, RunCheckpoint
 
 DOWNLOAD_DIR = Path.cwd() / "downloads"
 VIEW_TIMEOUT = 15_000
@@ -31,429 +67,53 @@ PROPERTY_PORTAL_URLS = [
     # AUTO_SEARCH_V1:CARVER
     "https://portal.onehome.com/en-US/properties?token=eyJPU04iOiJOU1RBUiIsInR5cGUiOiIxIiwiY29udGFjdGlkIjo3OTMzNzI0LCJzZXRpZCI6IjgxNTEyNCIsInNldGtleSI6IjY2IiwiZW1haWwiOiJ0d2FnbmVyNTVAZ21haWwuY29tIiwicmVzb3VyY2VpZCI6MCwiYWdlbnRpZCI6MTg0NDcyLCJpc2RlbHRhIjpmYWxzZSwiVmlld01vZGUiOiIxIn0=&SMS=0",
 ]
-LOT_LOOKUP_LIMIT = int(os.environ.get("LOT_LOOKUP_LIMIT", "25"))
-LOT_MATCH_THRESHOLD = float(os.environ.get("LOT_MATCH_THRESHOLD", "0.65"))
-LOT_MATCH_MODE = os.environ.get("LOT_MATCH_MODE", "improved").lower()
-DB_CLIENT = DatabaseClient(DatabaseConfig())
+EXPORT_STREAM = os.environ.get("EXPORT_STREAM", "").lower() in {"1", "true", "yes"}
+EXPORT_ARCHIVE = os.environ.get("EXPORT_ARCHIVE", "").lower() in {"1", "true", "yes"}
+EXPORT_CHUNK_SIZE = 64 * 1024
+COLUMNAR_STREAM_BATCH_ROWS = 5_000
+EXPORT_RETRIES = int(os.environ.get("EXPORT_RETRIES", "2"))
+EXPORT_RETRY_BACKOFF = float(os.environ.get("EXPORT_RETRY_BACKOFF", "5"))
+EXPORT_CHECKPOINT_KIND = "export"
+EXPORT_STREAMED_STATUS = "streamed"
+# Storage state (cookies + localStorage) loaded into each context and re-saved
+# after a successful export, so the portal remembers the dismissed intro and view.
+BROWSER_STORAGE_STATE = (
+    Path(os.environ["BROWSER_STORAGE_STATE"]) if os.environ.get("BROWSER_STORAGE_STATE") else None
+)
+# Chromium user-data directory; when set, contexts are persistent and keep their
+# disk HTTP cache (and localStorage) across contexts and runs.
+BROWSER_CACHE_DIR = (
+    Path(os.environ["BROWSER_CACHE_DIR"]) if os.environ.get("BROWSER_CACHE_DIR") else None
+)
 
 
 def log(message: str):
     print(f"[workflow] {message}")
 
 
-DIRECTION_TOKENS = {
-    "n",
-    "s",
-    "e",
-    "w",
-    "ne",
-    "nw",
-    "se",
-    "sw",
-    "north",
-    "south",
-    "east",
-    "west",
-    "northeast",
-    "northwest",
-    "southeast",
-    "southwest",
-}
-STREET_TYPE_TOKENS = {
-    "st",
-    "street",
-    "ave",
-    "avenue",
-    "rd",
-    "road",
-    "dr",
-    "drive",
-    "ln",
-    "lane",
-    "blvd",
-    "boulevard",
-    "cir",
-    "circle",
-    "ct",
-    "court",
-    "pl",
-    "place",
-    "ter",
-    "terrace",
-    "trl",
-    "trail",
-    "pkwy",
-    "parkway",
-    "way",
-}
-UNIT_TOKENS = {"apt", "unit", "suite", "ste"}
-
-
-def normalize_address(address: str | None, city: str | None) -> str:
-    address = (address or "").strip()
-    city = (city or "").strip()
-    if address and city:
-        return f"{address}, {city}"
-    return address or city
-
-
-def tokenize(value: str | None) -> list[str]:
-    if not value:
-        return []
-    cleaned = re.sub(r"[^\w\s#]", " ", value.lower())
-    return [token for token in cleaned.split() if token]
-
-
-def strip_unit_tokens(tokens: list[str]) -> list[str]:
-    for index, token in enumerate(tokens):
-        if token in UNIT_TOKENS or token.startswith("#"):
-            return tokens[:index]
-    return tokens
-
-
-def remove_unit_tokens(tokens: list[str]) -> list[str]:
-    return [token for token in tokens if token not in UNIT_TOKENS and not token.startswith("#")]
-
-
-def split_street_components(address: str | None) -> tuple[str | None, str | None]:
-    if not address:
-        return None, None
-    parts = tokenize(address)
-    if not parts:
-        return None, None
-    first = parts[0].rstrip()
-    if first.isdigit():
-        remainder = strip_unit_tokens(parts[1:])
-        return first, " ".join(remainder).strip() or None
-    remainder = strip_unit_tokens(parts)
-    return None, " ".join(remainder).strip() or None
-
-
-def extract_street_tokens(address: str | None) -> list[str]:
-    if not address:
-        return []
-    _, street_name = split_street_components(address)
-    tokens = tokenize(street_name)
-    return tokens
-
-
-def significant_street_tokens(tokens: list[str]) -> list[str]:
-    return [
-        token
-        for token in tokens
-        if token not in DIRECTION_TOKENS and token not in STREET_TYPE_TOKENS
-    ]
-
-
-def extract_postal_code(record: dict[str, Any]) -> str | None:
-    for key in ("Zip", "ZIP", "Zip Code", "PostalCode", "Postal Code", "Postal"):
-        value = record.get(key)
-        if not value:
-            continue
-        digits = "".join(ch for ch in str(value) if ch.isdigit())
-        if len(digits) >= 5:
-            return digits[:5]
-    address = record.get("Address")
-    city = record.get("City")
-    combined = normalize_address(address, city)
-    if combined:
-        return extract_zip_from_text(combined)
-    return None
-
-
-def city_variants(city: str | None) -> list[str]:
-    tokens = tokenize(city)
-    if not tokens:
-        return []
-    variants = {" ".join(tokens)}
-    if tokens[0] == "st":
-        variants.add("saint " + " ".join(tokens[1:]))
-    if tokens[0] == "saint":
-        variants.add("st " + " ".join(tokens[1:]))
-    return list(variants)
-
-
-def normalize_for_match(text: str) -> str:
-    tokens = remove_unit_tokens(tokenize(text))
-    return " ".join(tokens)
-
-
-def extract_house_number_from_text(text: str | None) -> str | None:
-    if not text:
-        return None
-    stripped = text.strip()
-    if not stripped:
-        return None
-    return stripped.split()[0]
-
-
-def extract_zip_from_text(text: str | None) -> str | None:
-    if not text:
-        return None
-    stripped = text.strip()
-    if not stripped:
-        return None
-    last_token = stripped.split()[-1]
-    digits = "".join(ch for ch in last_token if ch.isdigit())
-    if len(digits) >= 5:
-        return digits[:5]
-    return None
-
-
-def strip_trailing_state_tokens(tokens: list[str]) -> list[str]:
-    if tokens and tokens[-1].isalpha() and len(tokens[-1]) == 2:
-        return tokens[:-1]
-    return tokens
-
-
-def build_detail_tokens_from_text(
-    text: str | None,
-    house_number: str | None,
-    postal_code: str | None,
-) -> list[str]:
-    tokens = remove_unit_tokens(tokenize(text))
-    if house_number and tokens and tokens[0] == house_number.lower():
-        tokens = tokens[1:]
-    if postal_code and tokens and tokens[-1] == postal_code:
-        tokens = tokens[:-1]
-    tokens = strip_trailing_state_tokens(tokens)
-    return tokens
-
-
-def build_db_house_number(row: dict[str, Any], formatted: str | None) -> str | None:
-    anumber = row.get("anumber")
-    if anumber is not None:
-        prefix = (row.get("anumberpre") or "").strip()
-        suffix = (row.get("anumbersuf") or "").strip()
-        base = f"{anumber}"
-        return f"{prefix}{base}{suffix}" if prefix or suffix else base
-    if formatted:
-        return extract_house_number_from_text(formatted)
-    return None
-
-
-def make_like_fragment(value: str | None) -> tuple[str, str] | None:
-    if not value:
-        return None
-    lowered = value.lower().strip()
-    if not lowered:
-        return None
-    return "formatted_address ILIKE %s", f"%{lowered}%"
-
-
-def make_number_fragment(value: str | None) -> tuple[str, str] | None:
-    if not value:
-        return None
-    digits = "".join(ch for ch in value if ch.isdigit())
-    if not digits:
-        return None
-    return "formatted_address ILIKE %s", f"%{digits}%"
-
-
-def query_lot_candidates(fragments: list[tuple[str, str]]):
-    if not fragments:
-        return []
-    where_clause = " AND ".join(fragment for fragment, _ in fragments)
-    sql = f"SELECT * FROM lots WHERE {where_clause} LIMIT %s"
-    params = [value for _, value in fragments]
-    params.append(LOT_LOOKUP_LIMIT)
-    try:
-        return DB_CLIENT.query(sql, params)
-    except Exception as exc:  # pragma: no cover - defensive logging during runtime
-        log(f"lot_lookup: query failed - {exc}")
-        return []
-
-
-def fetch_lot_candidates(
-    address: str | None,
-    city: str | None,
-    postal_code: str | None,
-) -> list[dict[str, Any]]:
-    street_number, street_name = split_street_components(address)
-    street_tokens = extract_street_tokens(address)
-    significant_tokens = significant_street_tokens(street_tokens)
-    street_query = " ".join(significant_tokens) or street_name
-
-    city_fragments = [make_like_fragment(value) for value in city_variants(city)]
-    city_fragments = [fragment for fragment in city_fragments if fragment]
-    street_name_fragment = make_like_fragment(street_query)
-    number_fragment = make_number_fragment(street_number)
-    postal_fragment = make_number_fragment(postal_code)
-
-    strategies: list[list[tuple[str, str]]] = []
-    for city_fragment in city_fragments or [None]:
-        combined = [
-            fragment
-            for fragment in (city_fragment, street_name_fragment, number_fragment, postal_fragment)
-            if fragment
-        ]
-        if combined:
-            strategies.append(combined)
-
-        if postal_fragment and street_name_fragment and number_fragment:
-            strategies.append([postal_fragment, street_name_fragment, number_fragment])
-        if postal_fragment and number_fragment:
-            strategies.append([postal_fragment, number_fragment])
-        if city_fragment and street_name_fragment and number_fragment:
-            strategies.append([city_fragment, street_name_fragment, number_fragment])
-        if city_fragment and street_name_fragment:
-            strategies.append([city_fragment, street_name_fragment])
-        if street_name_fragment and number_fragment:
-            strategies.append([street_name_fragment, number_fragment])
-        if city_fragment and number_fragment:
-            strategies.append([city_fragment, number_fragment])
-        if postal_fragment and street_name_fragment:
-            strategies.append([postal_fragment, street_name_fragment])
-
-    if not number_fragment and postal_fragment:
-        strategies.append([postal_fragment])
-    if not number_fragment and street_name_fragment:
-        strategies.append([street_name_fragment])
-    if not number_fragment and city_fragments:
-        strategies.extend([[fragment] for fragment in city_fragments if fragment])
-
-    seen: set[tuple[str, ...]] = set()
-    for fragments in strategies:
-        key = tuple(fragment for fragment, _ in fragments)
-        if key in seen:
-            continue
-        seen.add(key)
-        rows = query_lot_candidates(fragments)
-        if rows:
-            return rows
-    return []
-
-
-def fetch_number_zip_candidates(
-    house_number: str | None,
-    postal_code: str | None,
-) -> list[dict[str, Any]]:
-    fragments: list[tuple[str, str | int]] = []
-    if postal_code:
-        fragments.append(("zip = %s", postal_code))
-    if house_number:
-        if house_number.isdigit():
-            fragments.append(("anumber = %s", int(house_number)))
-        else:
-            fragments.append(("formatted_address ILIKE %s", f"{house_number} %"))
-    if not fragments:
-        return []
-    return list(query_lot_candidates(fragments))
-
-
-def number_zip_lot_lookup(record: dict[str, Any]) -> dict[str, Any] | None:
-    address = record.get("Address")
-    city = record.get("City")
-    postal_code = extract_postal_code(record)
-    combined_text = " ".join(part for part in (address, city, postal_code) if part)
-    if not combined_text:
-        return None
-
-    house_number = extract_house_number_from_text(address or combined_text)
-    zip_code = extract_zip_from_text(combined_text) or postal_code
-    if not house_number or not zip_code:
-        return None
-
-    candidates = fetch_number_zip_candidates(house_number, zip_code)
-    if not candidates:
-        return None
-
-    target_detail = " ".join(
-        build_detail_tokens_from_text(combined_text, house_number, zip_code)
-    )
-    best_row: dict[str, Any] | None = None
-    best_score = 0.0
-    for row in candidates:
-        formatted = row.get("formatted_address")
-        if not formatted:
-            continue
-        db_house = build_db_house_number(row, formatted)
-        db_zip = (row.get("zip") or "").strip() or extract_zip_from_text(formatted)
-        if not db_house or not db_zip:
-            continue
-        if db_house.lower() != house_number.lower():
-            continue
-        if db_zip != zip_code:
-            continue
-
-        candidate_detail = " ".join(
-            build_detail_tokens_from_text(formatted, db_house, db_zip)
-        )
-        score = SequenceMatcher(None, candidate_detail, target_detail).ratio()
-        if score > best_score:
-            best_row = row
-            best_score = score
-
-    if not best_row or best_score < LOT_MATCH_THRESHOLD:
-        return None
-
-    match = dict(best_row)
-    match["match_score"] = round(best_score, 4)
-    return match
-
-
-def lot_lookup(
-    record: dict[str, Any],
-    mode: str | None = None,
-) -> dict[str, Any] | None:
-    resolved_mode = (mode or LOT_MATCH_MODE).lower()
-    if resolved_mode in {"number_zip", "number-zip", "zip"}:
-        return number_zip_lot_lookup(record)
-    address = record.get("Address")
-    city = record.get("City")
-    postal_code = extract_postal_code(record)
-    target = normalize_address(address, city)
-    if not target:
-        return None
-
-    candidates = fetch_lot_candidates(address, city, postal_code)
-    if not candidates:
-        return None
-
-    target_number, _ = split_street_components(address)
-    target_street_tokens = significant_street_tokens(extract_street_tokens(address))
-    target_numeric_tokens = [
-        token for token in target_street_tokens if any(ch.isdigit() for ch in token)
-    ]
-    normalized_target = normalize_for_match(target)
-
-    best_row: dict[str, Any] | None = None
-    best_score = 0.0
-    for row in candidates:
-        formatted = row.get("formatted_address")
-        if not formatted:
-            continue
-        formatted_tokens = set(remove_unit_tokens(tokenize(formatted)))
-        if target_number and target_number not in formatted_tokens:
-            continue
-        if target_numeric_tokens and not any(
-            token in formatted_tokens for token in target_numeric_tokens
-        ):
-            continue
-        if target_street_tokens and not any(
-            token in formatted_tokens for token in target_street_tokens
-        ):
-            continue
-
-        normalized_formatted = normalize_for_match(formatted)
-        score = SequenceMatcher(None, normalized_formatted, normalized_target).ratio()
-        if score > best_score:
-            best_row = row
-            best_score = score
+class RowConsumerError(RuntimeError):
+    """``on_row`` failed (lot lookup, sink flush, ...); not a scrape failure, so never retried."""
 
-    if not best_row or best_score < LOT_MATCH_THRESHOLD:
-        return None
 
-    match = dict(best_row)
-    match["match_score"] = round(best_score, 4)
-    return match
+def __getattr__(name: str):
+    # DB_CLIENT used to be built at import time; keep the name, build it lazily.
+    if name == "DB_CLIENT":
+        return get_db_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def make_step_tracker(summary: dict):
+    started_at: dict[str, float] = {}
+
     def track(step: str, status: str, detail: str | None = None):
         entry = {"step": step, "status": status}
         if detail:
             entry["detail"] = detail
+        now = time.perf_counter()
+        if status == "started":
+            started_at[step] = now
+        elif step in started_at:
+            entry["elapsed_ms"] = round((now - started_at.pop(step)) * 1000, 1)
         summary["steps"].append(entry)
 
     return track
@@ -492,6 +152,48 @@ async def click_view_as_list(page):
     await locator.click()
 
 
+async def detect_restored_view(page) -> tuple[bool, bool]:
+    """Wait for a restored session to render; returns ``(overlay_shown, list_view_shown)``.
+
+    Races the intro close icon, the export button and the "View as List"
+    toggle, so every restored state (fresh, intro remembered, list view
+    remembered) resolves as soon as the page renders. A timeout propagates
+    like any other page timeout.
+    """
+
+    close_icon = page.locator("svg path[d^='M13.73']").first
+    export_button = page.get_by_role("button", name="Export to CSV")
+    list_toggle = page.locator("div.radio-mock[data-tooltip='View as List']")
+    await (
+        close_icon.or_(export_button).or_(list_toggle).first.wait_for(
+            state="visible", timeout=VIEW_TIMEOUT
+        )
+    )
+    return await close_icon.is_visible(), await export_button.is_visible()
+
+
+async def open_browser_context(playwright):
+    """Return ``(browser, context)``; ``browser`` is None for a persistent context."""
+
+    if BROWSER_CACHE_DIR is not None:
+        BROWSER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        context = await playwright.chromium.launch_persistent_context(
+            str(BROWSER_CACHE_DIR), headless=True, accept_downloads=True
+        )
+        log(f"run_workflow: Persistent context opened on {BROWSER_CACHE_DIR}; downloads enabled.")
+        return None, context
+
+    browser = await playwright.chromium.launch(headless=True)
+    log("run_workflow: Chromium browser launched (headless=True).")
+    options = {"accept_downloads": True}
+    if BROWSER_STORAGE_STATE is not None and BROWSER_STORAGE_STATE.exists():
+        options["storage_state"] = str(BROWSER_STORAGE_STATE)
+        log(f"run_workflow: Restoring storage state from {BROWSER_STORAGE_STATE}.")
+    context = await browser.new_context(**options)
+    log("run_workflow: Browser context created; downloads enabled.")
+    return browser, context
+
+
 async def export_to_csv(page, download_dir: Path):
     log(f"export_to_csv: Preparing to export CSV into {download_dir}.")
     button = page.get_by_role("button", name="Export to CSV")
@@ -506,6 +208,84 @@ async def export_to_csv(page, download_dir: Path):
     return target_path
 
 
+def iter_csv_lines(chunks):
+    """Incrementally decode byte chunks (BOM-aware) into newline-terminated lines.
+
+    Splits on ``\n`` only, like a file opened with ``newline=""``; ``str.splitlines``
+    would also break unquoted fields on form feeds, ``\x1c``-``\x1e``, ``\x85``, etc.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_byte_rows(chunks):
+    yield from csv.DictReader(iter_csv_lines(chunks))
+
+
+def iter_file_chunks(path: Path, chunk_size: int = EXPORT_CHUNK_SIZE):
+    with path.open("rb") as source_file:
+        while chunk := source_file.read(chunk_size):
+            yield chunk
+
+
+async def stream_export_rows(page, on_row, archive_dir: Path | None = None):
+    """Export the CSV and feed each row to ``on_row(row, export_filename)`` as it is parsed.
+
+    Playwright's Python API exposes the finished download as a temp file
+    rather than a live stream, so rows are parsed straight from that artifact
+    in chunks while the optional archive copy runs as a side task. ``on_row``
+    runs on a worker thread, so it may block (lot lookups, sink flushes)
+    without stalling the event loop.
+    """
+
+    log("stream_export_rows: Preparing to stream CSV export.")
+    button = page.get_by_role("button", name="Export to CSV")
+    await button.wait_for(state="visible", timeout=VIEW_TIMEOUT)
+    async with page.expect_download() as download_info:
+        log("stream_export_rows: Export button ready, clicking to trigger download.")
+        await button.click()
+    download = await download_info.value
+    source_path = Path(await download.path())
+
+    archive_task = None
+    archive_path = None
+    if archive_dir is not None:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        archive_path = archive_dir / download.suggested_filename
+        archive_task = asyncio.create_task(download.save_as(archive_path))
+
+    def consume() -> int:
+        count = 0
+        for count, row in enumerate(iter_csv_byte_rows(iter_file_chunks(source_path)), start=1):
+            try:
+                on_row(row, download.suggested_filename)
+            except Exception as exc:
+                raise RowConsumerError(
+                    f"row {count} of {download.suggested_filename}: {exc}"
+                ) from exc
+        return count
+
+    try:
+        row_count = await asyncio.to_thread(consume)
+    except RowConsumerError:
+        if archive_task is not None:
+            archive_task.cancel()
+        raise
+    if archive_task is not None:
+        await archive_task
+    log(f"stream_export_rows: Streamed {row_count} row(s) from {download.suggested_filename}.")
+    return download.suggested_filename, archive_path, row_count
+
+
 def resolve_urls() -> list[str]:
     log("resolve_urls: Starting URL resolution workflow.")
     env_urls = os.environ.get("URLS_JSON")
@@ -535,7 +315,7 @@ def resolve_urls() -> list[str]:
     return PROPERTY_PORTAL_URLS.copy()
 
 
-async def run_workflow(url: str):
+async def run_workflow(url: str, stream_rows: bool = EXPORT_STREAM, on_row=None):
     summary: dict = {
         "status": "pending",
         "download_path": None,
@@ -550,14 +330,13 @@ async def run_workflow(url: str):
     track("init", "ok", f"Download dir: {download_dir}")
     log(f"Using download directory {download_dir}")
 
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
     try:
         log("run_workflow: Launching Playwright and Chromium browser.")
         async with async_playwright() as playwright:
             log("run_workflow: Playwright context acquired.")
-            browser = await playwright.chromium.launch(headless=True)
-            log("run_workflow: Chromium browser launched (headless=True).")
-            context = await browser.new_context(accept_downloads=True)
-            log("run_workflow: Browser context created; downloads enabled.")
+            browser, context = await open_browser_context(playwright)
             page = await context.new_page()
             log("run_workflow: New page opened, beginning scripted interactions.")
 
@@ -568,29 +347,70 @@ async def run_workflow(url: str):
                 log("run_workflow: Navigation completed, network idle.")
                 track("navigate", "ok")
 
-                track("close_overlay", "started", "Closing intro overlay")
-                log("Closing intro overlay...")
-                await click_close_icon(page)
-                log("run_workflow: Intro overlay closed.")
-                track("close_overlay", "ok")
-
-                track("view_mode", "started", "Switching to list view")
-                log("Switching to list view...")
-                await click_view_as_list(page)
-                log("run_workflow: List view confirmed.")
-                track("view_mode", "ok")
+                overlay_shown, list_view_shown = True, False
+                if BROWSER_STORAGE_STATE is not None or BROWSER_CACHE_DIR is not None:
+                    overlay_shown, list_view_shown = await detect_restored_view(page)
+
+                if overlay_shown:
+                    track("close_overlay", "started", "Closing intro overlay")
+                    log("Closing intro overlay...")
+                    await click_close_icon(page)
+                    log("run_workflow: Intro overlay closed.")
+                    track("close_overlay", "ok")
+                else:
+                    log("run_workflow: Intro overlay remembered as dismissed; skipping.")
+                    track("close_overlay", "skipped", "Intro remembered as dismissed")
+
+                if not list_view_shown:
+                    track("view_mode", "started", "Switching to list view")
+                    log("Switching to list view...")
+                    await click_view_as_list(page)
+                    log("run_workflow: List view confirmed.")
+                    track("view_mode", "ok")
+                else:
+                    log("run_workflow: List view remembered; skipping view switch.")
+                    track("view_mode", "skipped", "List view remembered")
 
                 track("export", "started", "Exporting to CSV")
-                log("Triggering Export to CSV...")
-                csv_path = await export_to_csv(page, download_dir)
-                summary["download_path"] = str(csv_path)
-                log(f"CSV saved to: {csv_path}")
+                if stream_rows:
+                    log("Streaming Export to CSV...")
+                    if on_row is None:
+                        # No consumer: keep the rows on the summary for the caller.
+                        summary["rows"] = []
+                        on_row = lambda row, _filename: summary["rows"].append(row)  # noqa: E731
+                    filename, archive_path, row_count = await stream_export_rows(
+                        page,
+                        on_row,
+                        download_dir if EXPORT_ARCHIVE else None,
+                    )
+                    summary["streamed"] = True
+                    summary["streamed_rows"] = row_count
+                    summary["export_filename"] = filename
+                    if archive_path is not None:
+                        summary["download_path"] = str(archive_path)
+                    log(f"CSV streamed: {row_count} row(s) from {filename}")
+                else:
+                    log("Triggering Export to CSV...")
+                    csv_path = await export_to_csv(page, download_dir)
+                    summary["download_path"] = str(csv_path)
+                    summary["export_filename"] = csv_path.name
+                    log(f"CSV saved to: {csv_path}")
                 track("export", "ok")
                 summary["status"] = "success"
 
+                if BROWSER_STORAGE_STATE is not None:
+                    BROWSER_STORAGE_STATE.parent.mkdir(parents=True, exist_ok=True)
+                    await context.storage_state(path=str(BROWSER_STORAGE_STATE))
+                    log(f"run_workflow: Storage state saved to {BROWSER_STORAGE_STATE}.")
+
             finally:
                 await context.close()
-                await browser.close()
+                if browser is not None:
+                    await browser.close()
+
+    except RowConsumerError:
+        # Re-exporting would feed the same rows to the consumer again; let the caller see it.
+        raise
 
     except PlaywrightTimeoutError as exc:
         summary["status"] = "failed"
@@ -621,7 +441,7 @@ def iter_combined_csv_rows(csv_paths: list[Path]):
 
     for csv_path in csv_paths:
         log(f"iter_combined_csv_rows: Reading source CSV {csv_path}.")
-        with csv_path.open("r", newline="", encoding="utf-8") as source_file:
+        with csv_path.open("r", newline="", encoding="utf-8-sig") as source_file:
             reader = csv.DictReader(source_file)
             header = reader.fieldnames
             if not header:
@@ -640,36 +460,160 @@ def iter_combined_csv_rows(csv_paths: list[Path]):
                 yield dict(row)
 
 
-async def process_all_urls(urls: list[str]):
+def resumed_summary(url: str, entry: dict) -> dict:
+    return {
+        "status": "success",
+        "download_path": entry["download_path"],
+        "export_filename": entry.get("export_filename"),
+        "steps": [{"step": "resume", "status": "skipped", "detail": "Export already checkpointed"}],
+        "traceback": None,
+        "url": url,
+        "resumed": True,
+        # Streamed rows were handed to the consumer by the earlier run; don't re-read the archive.
+        "streamed": entry["status"] == EXPORT_STREAMED_STATUS,
+    }
+
+
+def export_already_done(entry: dict | None) -> bool:
+    if entry is None:
+        return False
+    if entry["status"] == EXPORT_STREAMED_STATUS:
+        return True
+    download_path = entry.get("download_path")
+    return entry["status"] == "ok" and bool(download_path) and Path(download_path).exists()
+
+
+async def run_workflow_with_retries(url: str, retries: int = EXPORT_RETRIES, on_row=None):
+    attempt = 0
+    while True:
+        attempt += 1
+        summary = await run_workflow(url, on_row=on_row)
+        summary["attempts"] = attempt
+        if summary["status"] == "success" or attempt > retries:
+            return summary
+        delay = EXPORT_RETRY_BACKOFF * 2 ** (attempt - 1)
+        log(
+            f"run_workflow_with_retries: Attempt {attempt} failed ({summary.get('error')});"
+            f" retrying in {delay:.1f}s."
+        )
+        await asyncio.sleep(delay)
+
+
+async def process_all_urls(
+    urls: list[str],
+    checkpoint: RunCheckpoint | None = None,
+    on_row=None,
+):
+    """Export every URL; streamed exports feed ``on_row(row, export_filename)`` as they parse."""
+
     log(f"process_all_urls: Starting processing for {len(urls)} URL(s).")
     results = []
     for index, url in enumerate(urls, start=1):
+        entry = checkpoint.get(EXPORT_CHECKPOINT_KIND, url) if checkpoint else None
+        if export_already_done(entry):
+            log(f"process_all_urls: Skipping workflow {index}/{len(urls)}; export checkpointed.")
+            results.append(resumed_summary(url, entry))
+            continue
         log(f"process_all_urls: Beginning workflow {index}/{len(urls)}.")
         print(f"Processing: {url}")
-        results.append(await run_workflow(url))
+        summary = await run_workflow_with_retries(url, on_row=on_row)
+        results.append(summary)
+        if checkpoint is not None:
+            # A streamed export's rows already reached the consumer (and the sink),
+            # so it is done even without an archive copy on disk.
+            if summary["status"] != "success":
+                status = "failed"
+            elif summary.get("streamed"):
+                status = EXPORT_STREAMED_STATUS
+            else:
+                status = "ok"
+            checkpoint.record(
+                EXPORT_CHECKPOINT_KIND,
+                url,
+                status,
+                download_path=summary["download_path"],
+                export_filename=summary.get("export_filename"),
+                attempts=summary["attempts"],
+                error=summary.get("error"),
+            )
         log(f"process_all_urls: Completed workflow {index}/{len(urls)}.")
     log("process_all_urls: All workflows completed.")
     return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export portal CSVs and log the combined rows.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip URLs whose export is already checkpointed and retry only the failures.",
+    )
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_DIR / "extract_hrefs.jsonl")
+    args = parser.parse_args()
+
     log("main: Workflow runner starting up.")
     url_list = resolve_urls()
     log(f"main: URL list ready with {len(url_list)} entries.")
-    result = asyncio.run(process_all_urls(url_list))
-    log("main: Workflow runner finished execution.")
-    csv_paths = [
-        Path(item["download_path"])
-        for item in result
-        if item.get("download_path")
-    ]
+    run_id = os.environ.get("MATCH_RUN_ID") or new_run_id()
+    sink = None
+    if sink_enabled():
+        sink = MatchResultsSink(get_db_client(), run_id=run_id)
+        log(f"main: Upserting lot matches into {sink.table} (run {sink.run_id}).")
+    columnar_batches: dict[str, list[Listing]] = {}
     record_count = 0
-    for record_count, obj in enumerate(iter_combined_csv_rows(csv_paths), start=1):
-        payload = dict(obj)
-        log(obj)
-        # match = lot_lookup(payload)
-        # payload["lot_match"] = match
-        # log(f"json_record_{record_count}: {json.dumps(payload, default=str)}")
+
+    def flush_columnar(export_filename: str):
+        batch = columnar_batches.pop(export_filename, None)
+        if batch:
+            columnar_store.write_listings(
+                batch, run_id, columnar_store.county_from_path(Path(export_filename))
+            )
+
+    def consume_row(row: dict, export_filename: str | None = None):
+        global record_count
+        record_count += 1
+        log(row)
+        listing = None
+        if sink is not None:
+            listing = Listing.from_row(row)
+            sink.add(LOT_MATCH_MODE, listing, lot_lookup(listing))
+        if export_filename and columnar_store.columnar_enabled():
+            batch = columnar_batches.setdefault(export_filename, [])
+            batch.append(listing or Listing.from_row(row))
+            if len(batch) >= COLUMNAR_STREAM_BATCH_ROWS:
+                flush_columnar(export_filename)
+        # match = lot_lookup(row)
+        # row["lot_match"] = match
+        # log(f"json_record_{record_count}: {json.dumps(row, default=str)}")
+
+    try:
+        with RunCheckpoint(args.checkpoint, resume=args.resume) as checkpoint:
+            result = asyncio.run(process_all_urls(url_list, checkpoint, on_row=consume_row))
+            log(f"main: Export checkpoint {args.checkpoint}: {checkpoint.counts(EXPORT_CHECKPOINT_KIND)}")
+        log("main: Workflow runner finished execution.")
+        for export_filename in list(columnar_batches):
+            flush_columnar(export_filename)
+
+        # Streamed exports were matched as they arrived; only file exports are read back.
+        csv_paths = [
+            Path(item["download_path"])
+            for item in result
+            if item.get("download_path") and not item.get("streamed")
+        ]
+        if columnar_store.columnar_enabled():
+            for csv_path in csv_paths:
+                columnar_store.write_listings(
+                    iter_listings([csv_path]),
+                    run_id,
+                    columnar_store.county_from_path(csv_path),
+                )
+        for row in iter_combined_csv_rows(csv_paths):
+            consume_row(row)
+    finally:
+        # Also on a crash: the sink holds up to MATCH_RESULTS_BATCH_SIZE - 1 unflushed results.
+        if sink is not None:
+            sink.flush()
+            log(f"main: Upserted {sink.written} lot match result(s).")
 
     if record_count == 0:
         log("main: No rows found across downloaded CSVs; nothing to log.")
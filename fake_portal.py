@@ -0,0 +1,242 @@
+"""Local stand-in for the onehome property portal.
+
+Serves a listings page with the same hooks ``run_workflow`` drives on the live
+site: the intro overlay whose close icon is an ``svg path[d^='M13.73']``, the
+``div.radio-mock[data-tooltip='View as List']`` toggle and an "Export to CSV"
+button that downloads a generated, BOM-prefixed portal CSV. Like the live
+site, the page remembers a dismissed intro and the chosen view in
+localStorage, so a restored browser session lands directly in list view.
+Asset weight, response delays and CSV size are configurable so scrape latency
+can be measured offline; per-path request counts show how much a warm HTTP
+cache saves.
+
+Usage:
+    python fake_portal.py [--port 8766] [--rows 300] [--assets 4] [--asset-kb 256]
+                          [--page-delay-ms 0] [--asset-delay-ms 0] [--export-delay-ms 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+PORTAL_HEADER = [
+    "MLS #",
+    "Status",
+    "Price",
+    "Address",
+    "City",
+    "Property Type",
+    "Beds",
+    "Baths",
+    "Square Footage",
+    "Lot Size",
+    "Price per/Sqft",
+    "Favorite",
+    "Utilities",
+]
+FAKE_STREETS = ["Harbor Lane N", "116th Avenue N", "Xenwood Avenue S", "Ulysses Street NE", "Gale Road"]
+FAKE_CITIES = ["Dayton", "Minneapolis", "St Louis Park", "Plymouth", "Wayzata"]
+FAKE_TYPES = ["Single Family Residence", "Condominium", "Townhouse"]
+
+LISTINGS_PAGE = """<!doctype html>
+<html>
+<head>
+<title>Fake portal</title>
+<style>
+  #overlay {{ position: fixed; inset: 0; background: rgba(0, 0, 0, .6); z-index: 10; }}
+  #overlay svg {{ position: absolute; top: 20px; right: 20px; width: 24px; height: 24px; cursor: pointer; }}
+  #export {{ display: none; }}
+  body.list-view #export {{ display: inline-block; }}
+</style>
+{assets}
+</head>
+<body>
+<div id="overlay">
+  <svg viewBox="0 0 24 24" onclick="dismissIntro()">
+    <path d="M13.73 12l5.64-5.64-1.73-1.73L12 10.27 6.36 4.63 4.63 6.36 10.27 12l-5.64 5.64 1.73 1.73L12 13.73l5.64 5.64 1.73-1.73z"></path>
+  </svg>
+</div>
+<div class="radio-mock" data-tooltip="View as Map">Map</div>
+<div class="radio-mock" data-tooltip="View as List" onclick="showList()">List</div>
+<button id="export" type="button" onclick="window.location.href='/export.csv?token={token}'">Export to CSV</button>
+<script>
+  function dismissIntro() {{
+    localStorage.setItem("introDismissed", "1");
+    document.getElementById("overlay").remove();
+  }}
+  function showList() {{
+    localStorage.setItem("viewMode", "list");
+    document.body.classList.add("list-view");
+  }}
+  if (localStorage.getItem("introDismissed")) document.getElementById("overlay").remove();
+  if (localStorage.getItem("viewMode") === "list") document.body.classList.add("list-view");
+</script>
+</body>
+</html>
+"""
+
+
+@dataclass
+class PortalConfig:
+    rows: int = 300
+    assets: int = 4
+    asset_kb: int = 256
+    page_delay_ms: int = 0
+    asset_delay_ms: int = 0
+    export_delay_ms: int = 0
+    seed: int = 7
+
+
+def generate_csv(rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+    writer.writerow(PORTAL_HEADER)
+    for index in range(rows):
+        square_feet = rng.randint(600, 4_500)
+        price = rng.randint(90, 1_500) * 1_000
+        writer.writerow(
+            [
+                str(7_000_000 + index),
+                "For Sale",
+                f"${price:,}",
+                f"{rng.randint(100, 24_999)} {rng.choice(FAKE_STREETS)}",
+                rng.choice(FAKE_CITIES),
+                rng.choice(FAKE_TYPES),
+                rng.randint(1, 6),
+                rng.randint(1, 4),
+                f"{square_feet:,} sqft",
+                f"{rng.randint(5, 200) / 100:.2f} acres",
+                f"${price // square_feet}",
+                "",
+                "- -",
+            ]
+        )
+    return b"\xef\xbb\xbf" + buffer.getvalue().encode("utf-8")
+
+
+class PortalRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: PortalConfig = PortalConfig()
+    requests: Counter = Counter()
+    _csv_cache: dict[tuple[int, int], bytes] = {}
+
+    def send_body(self, status: int, content_type: str, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        if parsed.path.endswith("/properties"):
+            self.requests["page"] += 1
+            time.sleep(self.config.page_delay_ms / 1000)
+            token = (query.get("token") or ["fake"])[0]
+            assets = "\n".join(
+                f'<script src="/assets/bundle-{index}.js"></script>' for index in range(self.config.assets)
+            )
+            page = LISTINGS_PAGE.format(assets=assets, token=token)
+            self.send_body(200, "text/html; charset=utf-8", page.encode("utf-8"))
+            return
+        if parsed.path.startswith("/assets/"):
+            self.requests["asset"] += 1
+            time.sleep(self.config.asset_delay_ms / 1000)
+            body = b"/*" + b"x" * max(0, self.config.asset_kb * 1024 - 4) + b"*/"
+            self.send_body(
+                200, "application/javascript", body, {"Cache-Control": "public, max-age=3600"}
+            )
+            return
+        if parsed.path == "/export.csv":
+            self.requests["export"] += 1
+            time.sleep(self.config.export_delay_ms / 1000)
+            token = (query.get("token") or ["fake"])[0]
+            key = (self.config.rows, self.config.seed)
+            if key not in self._csv_cache:
+                self._csv_cache[key] = generate_csv(*key)
+            county = re.sub(r"[^A-Z]", "", token.upper()) or "FAKE"
+            filename = f"AUTO_SEARCH_V1{county}_fake.csv"
+            self.send_body(
+                200,
+                "text/csv; charset=utf-8",
+                self._csv_cache[key],
+                {"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+            return
+        self.send_body(404, "text/plain", b"not found")
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+        return
+
+
+def start_portal(
+    config: PortalConfig,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """Serve the fake portal on a daemon thread; returns the server and its base URL.
+
+    Request counts are kept per server on ``server.RequestHandlerClass.requests``.
+    """
+
+    handler = type(
+        "ConfiguredPortalHandler",
+        (PortalRequestHandler,),
+        {"config": config, "requests": Counter()},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def portal_urls(base_url: str, count: int) -> list[str]:
+    # Letter-only tokens so each export gets its own county-like file name.
+    tokens = ["fake" + "".join(chr(97 + int(digit)) for digit in str(index)) for index in range(count)]
+    return [f"{base_url}/en-US/properties?token={token}&SMS=0" for token in tokens]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--rows", type=int, default=PortalConfig.rows)
+    parser.add_argument("--assets", type=int, default=PortalConfig.assets)
+    parser.add_argument("--asset-kb", type=int, default=PortalConfig.asset_kb)
+    parser.add_argument("--page-delay-ms", type=int, default=0)
+    parser.add_argument("--asset-delay-ms", type=int, default=0)
+    parser.add_argument("--export-delay-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    config = PortalConfig(
+        rows=args.rows,
+        assets=args.assets,
+        asset_kb=args.asset_kb,
+        page_delay_ms=args.page_delay_ms,
+        asset_delay_ms=args.asset_delay_ms,
+        export_delay_ms=args.export_delay_ms,
+    )
+    server, base_url = start_portal(config, args.host, args.port)
+    print(f"[fake-portal] serving {portal_urls(base_url, 1)[0]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
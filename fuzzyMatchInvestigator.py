@@ -1,25 +1,36 @@
 """Run fuzzy lot lookups for a fixed batch of addresses with verbose logging.
 
 Usage:
-    python fuzzyMatchInvestigator.py
+    python fuzzyMatchInvestigator.py [--resume] [--checkpoint checkpoints/fuzzy_match.jsonl]
 
 The script processes the first 50 workflow addresses five at a time, enforces a
 10-second PostgreSQL statement timeout for every lookup, logs the outcome after
-each address, and writes the aggregated results to MatchingSummary.csv.
+each address, and writes the aggregated results to MatchingSummary.csv. Set
+MATCH_RESULTS_SINK=1 to also upsert every result into the match_results table as
+the run progresses, and COLUMNAR_OUTPUT_DIR to append each mode's results as a
+Parquet partition. Every result is checkpointed as it is produced; ``--resume``
+reuses the checkpointed results (and run id) and only looks up the records that
+timed out or were never reached.
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
+import os
 from pathlib import Path
 
 from psycopg2.errors import QueryCanceled
 
-import extract_hrefs
+import columnar_store
+import lot_matching
+from listing_records import Listing, iter_listings
+from match_results_sink import LOT_KEY_COLUMN, MatchResultsSink, new_run_id, sink_enabled
+from run_checkpoint import CHECKPOINT_DIR, RunCheckpoint
 
 
-DB_CLIENT = extract_hrefs.DB_CLIENT
-LOT_LOOKUP_LIMIT = extract_hrefs.LOT_LOOKUP_LIMIT
+DB_CLIENT = lot_matching.get_db_client()
+LOT_LOOKUP_LIMIT = lot_matching.LOT_LOOKUP_LIMIT
 
 
 def query_lot_candidates_with_timeout(fragments):
@@ -28,10 +39,7 @@ def query_lot_candidates_with_timeout(fragments):
     if not fragments:
         return []
 
-    where_clause = " AND ".join(fragment for fragment, _ in fragments)
-    sql = f"SELECT * FROM lots WHERE {where_clause} LIMIT %s"
-    params = [value for _, value in fragments]
-    params.append(LOT_LOOKUP_LIMIT)
+    sql, params = lot_matching.build_lot_query(fragments)
 
     with DB_CLIENT.connect() as conn:
         with conn.cursor() as cur:
@@ -45,9 +53,9 @@ def query_lot_candidates_with_timeout(fragments):
             return []
 
 
-# Monkey-patch extract_hrefs to enforce the timeout for this run only.
-extract_hrefs.query_lot_candidates = query_lot_candidates_with_timeout
-lot_lookup = extract_hrefs.lot_lookup
+# Monkey-patch the matching core to enforce the timeout for this run only.
+lot_matching.query_lot_candidates = query_lot_candidates_with_timeout
+lot_lookup = lot_matching.lot_lookup
 
 ADDRESSES_ADJ = [
     # TODO: FILL THIS IN WITH ALL
@@ -132,43 +140,73 @@ def resolve_csv_paths() -> list[Path]:
     return ordered
 
 
-def load_workflow_records() -> list[dict[str, str]]:
+def load_workflow_records() -> list[Listing]:
     csv_paths = resolve_csv_paths()
     if not csv_paths:
-        return [dict(record) for record in ADDRESSES]
-    records: list[dict[str, str]] = []
-    for csv_path in csv_paths:
-        with csv_path.open("r", newline="", encoding="utf-8-sig") as source_file:
-            reader = csv.DictReader(source_file)
-            for row in reader:
-                if not row:
-                    continue
-                address = (row.get("Address") or "").strip()
-                city = (row.get("City") or "").strip()
-                if not address and not city:
-                    continue
-                records.append(dict(row))
-    return records
-
-
-def run_mode(mode: str, records: list[dict[str, str]]) -> list[tuple[str, str, float | None]]:
+        return [Listing.from_row(record) for record in ADDRESSES]
+    return list(iter_listings(csv_paths, columnar_store.county_from_path))
+
+
+def checkpoint_key(record: Listing) -> str:
+    return record.mls_number or record.json_address
+
+
+def checkpointed_match(entry: dict) -> dict | None:
+    if not entry["formatted"]:
+        return None
+    return {
+        "formatted_address": entry["formatted"],
+        "match_score": entry["score"],
+        LOT_KEY_COLUMN: entry.get("lot_key"),
+    }
+
+
+def run_mode(
+    mode: str,
+    records: list[Listing],
+    sink: MatchResultsSink | None = None,
+    checkpoint: RunCheckpoint | None = None,
+) -> list[tuple[str, str, float | None]]:
     batch_size = 5
+    kind = f"match:{mode}"
     results: list[tuple[str, str, float | None]] = []
     total = len(records)
+    resumed = 0
     for index, record in enumerate(records, start=1):
-        address = (record.get("Address") or "").strip()
-        city = (record.get("City") or "").strip()
-        json_address = f"{address}, {city}" if address and city else address or city
+        json_address = record.json_address
+        entry = checkpoint.completed(kind, checkpoint_key(record)) if checkpoint else None
+        if entry is not None:
+            # Looked up by an earlier run, whose last partial sink batch may never
+            # have been flushed; the upsert is idempotent, so add it again.
+            resumed += 1
+            if sink is not None:
+                sink.add(mode, record, checkpointed_match(entry))
+            results.append((json_address, entry["formatted"], entry["score"]))
+            continue
+
+        timed_out = False
         try:
             match = lot_lookup(record, mode=mode)
         except SystemExit as exc:
             print(f"[fuzzy] timeout after 10s on record {index}: {json_address}")
             print(f"[fuzzy] {exc}")
             match = None
+            timed_out = True
+        if sink is not None:
+            sink.add(mode, record, match)
 
         formatted = match.get("formatted_address") if match else ""
         score = match.get("match_score") if match else None
         results.append((json_address, formatted, score))
+        if checkpoint is not None:
+            checkpoint.record(
+                kind,
+                checkpoint_key(record),
+                "failed" if timed_out else "ok",
+                formatted=formatted,
+                score=score,
+                lot_key=match.get(LOT_KEY_COLUMN) if match else None,
+            )
 
         label = formatted if formatted else "NO MATCH"
         score_str = f"{score:.4f}" if score is not None else "n/a"
@@ -184,18 +222,56 @@ def run_mode(mode: str, records: list[dict[str, str]]) -> list[tuple[str, str, f
                 f" unmatched {batch_size - matched}"
             )
 
+    if resumed:
+        print(f"[fuzzy] {mode} reused {resumed}/{total} checkpointed result(s)")
+
+    gazetteer = lot_matching.get_zip_gazetteer()
+    # number_zip consults the gazetteer, and so does improved mode when
+    # LOT_IMPROVED_ZIP_PREPASS is on; otherwise the counters stay at zero.
+    if gazetteer is not None and any(gazetteer.stats.values()):
+        print(
+            f"[fuzzy] {mode} zip gazetteer: explicit {gazetteer.stats['explicit']},"
+            f" inferred {gazetteer.stats['inferred']} (moved to indexed path),"
+            f" unresolved {gazetteer.stats['unresolved']}"
+        )
+        gazetteer.stats = dict.fromkeys(gazetteer.stats, 0)
+
     results.sort(key=lambda item: item[2] if item[2] is not None else -1)
     return results
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse checkpointed results and only look up timed-out or unprocessed records.",
+    )
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_DIR / "fuzzy_match.jsonl")
+    args = parser.parse_args()
+
     records = load_workflow_records()
     modes = ["improved", "number_zip"]
     combined_results: list[tuple[str, str, str, float | None]] = []
-    for mode in modes:
-        results = run_mode(mode, records)
-        for json_address, formatted, score in results:
-            combined_results.append((mode, json_address, formatted, score))
+    checkpoint = RunCheckpoint(args.checkpoint, resume=args.resume)
+    # Keep the resumed run's id so sink and columnar rows land in the same run.
+    previous = checkpoint.get("run", "run_id")
+    run_id = os.environ.get("MATCH_RUN_ID") or (previous or {}).get("run_id") or new_run_id()
+    checkpoint.record("run", "run_id", "ok", run_id=run_id)
+    sink = MatchResultsSink(DB_CLIENT, run_id=run_id) if sink_enabled() else None
+    try:
+        for mode in modes:
+            results = run_mode(mode, records, sink, checkpoint)
+            if columnar_store.columnar_enabled():
+                # A resumed run rewrites the mode's partition with the merged results.
+                columnar_store.write_matches(results, run_id, mode, replace=True)
+            for json_address, formatted, score in results:
+                combined_results.append((mode, json_address, formatted, score))
+    finally:
+        checkpoint.close()
+        if sink is not None:
+            sink.flush()
+            print(f"[fuzzy] upserted {sink.written} result(s) for run {sink.run_id}")
 
     output_path = Path("MatchingSummary.csv")
     with output_path.open("w", newline="", encoding="utf-8") as fh:
@@ -0,0 +1,83 @@
+"""Guard the import cost of the matching modules.
+
+Usage:
+    python import_benchmark.py [--runs 5] [--budget-ms 50] [module ...]
+
+Each module is imported in a fresh interpreter ``--runs`` times. The script
+reports the median import time (excluding interpreter start-up) and exits
+non-zero when a module exceeds the budget or drags in one of the heavy
+dependencies (Playwright, psycopg2, pyarrow, NumPy) at import time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "50"))
+# Matching modules must fit the time budget; extract_hrefs (the scraper entry
+# point) only has to keep the heavy dependencies out of its import.
+GUARDED_MODULES = ["lot_matching", "listing_records", "zip_gazetteer"]
+HEAVY_ONLY_MODULES = ["extract_hrefs", "match_service"]
+HEAVY_MODULES = ["playwright", "psycopg2", "pyarrow", "numpy"]
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"elapsed_ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    samples: list[float] = []
+    heavy: set[str] = set()
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(result["elapsed_ms"])
+        heavy.update(result["heavy"])
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "heavy_imports": sorted(heavy),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("modules", nargs="*", default=GUARDED_MODULES + HEAVY_ONLY_MODULES)
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        result = measure(module, args.runs)
+        over_budget = module not in HEAVY_ONLY_MODULES and result["median_ms"] > args.budget_ms
+        status = "FAIL" if over_budget or result["heavy_imports"] else "ok"
+        print(
+            f"[import-bench] {status} {module}: median {result['median_ms']}ms"
+            f" (max {result['max_ms']}ms), heavy imports: {result['heavy_imports'] or 'none'}"
+        )
+        if status == "FAIL":
+            failures.append(result)
+
+    if failures:
+        raise SystemExit(f"[import-bench] {len(failures)} module(s) over budget or importing heavy deps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Typed listing records parsed once at CSV ingest.
+
+The portal exports are all strings (``"$429,000"``, ``"3,650 sqft"``,
+``"0.16 acres"``, ``"- -"``). ``Listing.from_row`` parses each row a single time
+into a slotted record with numeric fields and a whitespace-normalized address
+and city, plus the ZIP from whichever postal column the export carries;
+``Listing.get`` answers the original CSV header names so the record can be
+passed anywhere a ``csv.DictReader`` row was used (``lot_lookup``,
+``extract_postal_code``, the results sink).
+
+``load_listing_array`` is the batch form: a NumPy structured array for whole
+exports, with text columns sized to the longest value. It requires ``numpy``
+(``pip install numpy``; not in requirements.txt), which is only imported when
+it is called.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+
+PLACEHOLDER_VALUES = {"", "- -", "--", "-"}
+# Same order lot_matching.extract_postal_code checks them in.
+POSTAL_CODE_COLUMNS = ("Zip", "ZIP", "Zip Code", "PostalCode", "Postal Code", "Postal")
+
+
+NUMBER_PATTERN = re.compile(r"\$?([\d,]*\.?\d+)\+?")
+
+
+def parse_number(value: str | None) -> float | None:
+    """First token as a number (``"$429,000"``, ``"3,650 sqft"``, ``"0.16 acres"``); None otherwise."""
+
+    text = (value or "").strip()
+    if text in PLACEHOLDER_VALUES:
+        return None
+    match = NUMBER_PATTERN.fullmatch(text.split()[0])
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
+
+
+def clean_text(value: str | None) -> str:
+    text = " ".join((value or "").split())
+    return "" if text in PLACEHOLDER_VALUES else text
+
+
+@dataclass(slots=True)
+class Listing:
+    mls_number: str
+    status: str
+    price: float | None
+    address: str
+    city: str
+    property_type: str
+    beds: float | None
+    baths: float | None
+    square_footage: float | None
+    lot_size: float | None
+    price_per_sqft: float | None
+    postal_code: str = ""
+    county: str = ""
+
+    # CSV header -> attribute, so Listing.get mirrors the DictReader rows.
+    CSV_FIELDS = {
+        "MLS #": "mls_number",
+        "Status": "status",
+        "Price": "price",
+        "Address": "address",
+        "City": "city",
+        "Property Type": "property_type",
+        "Beds": "beds",
+        "Baths": "baths",
+        "Square Footage": "square_footage",
+        "Lot Size": "lot_size",
+        "Price per/Sqft": "price_per_sqft",
+    }
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any], county: str = "") -> "Listing":
+        return cls(
+            mls_number=clean_text(row.get("MLS #")),
+            status=clean_text(row.get("Status")),
+            price=parse_number(row.get("Price")),
+            address=clean_text(row.get("Address")),
+            city=clean_text(row.get("City")),
+            property_type=clean_text(row.get("Property Type")),
+            beds=parse_number(row.get("Beds")),
+            baths=parse_number(row.get("Baths")),
+            square_footage=parse_number(row.get("Square Footage")),
+            lot_size=parse_number(row.get("Lot Size")),
+            price_per_sqft=parse_number(row.get("Price per/Sqft")),
+            postal_code=next(
+                (text for text in (clean_text(row.get(key)) for key in POSTAL_CODE_COLUMNS) if text),
+                "",
+            ),
+            county=county,
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in POSTAL_CODE_COLUMNS:
+            # Whichever ZIP column the export had is answered under every alias.
+            return self.postal_code or default
+        attribute = self.CSV_FIELDS.get(key)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return default if value is None else value
+
+    @property
+    def json_address(self) -> str:
+        if self.address and self.city:
+            return f"{self.address}, {self.city}"
+        return self.address or self.city
+
+
+def iter_listings(csv_paths: Iterable[Path], county_of=None) -> Iterator[Listing]:
+    """Parse every non-empty row of ``csv_paths`` into ``Listing`` records."""
+
+    for csv_path in csv_paths:
+        county = county_of(csv_path) if county_of else ""
+        with csv_path.open("r", newline="", encoding="utf-8-sig") as source_file:
+            for row in csv.DictReader(source_file):
+                listing = Listing.from_row(row, county)
+                if listing.address or listing.city:
+                    yield listing
+
+
+# Text fields are "U" here and sized to the longest value in each batch, so
+# np.array never silently truncates an address.
+LISTING_DTYPE = [
+    ("mls_number", "U"),
+    ("status", "U"),
+    ("price", "f8"),
+    ("address", "U"),
+    ("city", "U"),
+    ("property_type", "U"),
+    ("beds", "f4"),
+    ("baths", "f4"),
+    ("square_footage", "f8"),
+    ("lot_size", "f8"),
+    ("price_per_sqft", "f8"),
+    ("postal_code", "U"),
+    ("county", "U"),
+]
+
+
+def require_numpy():
+    """Import NumPy on first use so importing this module stays cheap."""
+
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError("listing_records: numpy is required (pip install numpy)") from exc
+    return numpy
+
+
+def listing_dtype(listings: list[Listing]) -> list[tuple[str, str]]:
+    return [
+        (name, f"U{max((len(getattr(listing, name)) for listing in listings), default=0) or 1}")
+        if kind == "U"
+        else (name, kind)
+        for name, kind in LISTING_DTYPE
+    ]
+
+
+def listings_to_array(listings: Iterable[Listing]):
+    """Pack listings into a NumPy structured array; missing numbers become NaN."""
+
+    np = require_numpy()
+    listings = list(listings)
+    nan = float("nan")
+    rows = [
+        tuple(
+            nan if value is None else value
+            for value in (getattr(listing, name) for name, _ in LISTING_DTYPE)
+        )
+        for listing in listings
+    ]
+    return np.array(rows, dtype=listing_dtype(listings))
+
+
+def load_listing_array(csv_paths: Iterable[Path], county_of=None):
+    return listings_to_array(iter_listings(csv_paths, county_of))
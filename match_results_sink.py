@@ -0,0 +1,155 @@
+"""Batched Postgres sink for lot match results.
+
+Each result is keyed by ``(run_id, mode, record_key)`` where ``record_key`` is
+the listing's ``MLS #`` (or its address when the record has none). Rows are
+buffered and upserted with ``execute_values`` + ``ON CONFLICT`` every
+``MATCH_RESULTS_BATCH_SIZE`` results, and each flush commits on its own, so a
+crashed run keeps everything flushed before the crash and n8n can read the
+``match_results`` table instead of parsing MatchingSummary CSVs.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from database_client import DatabaseClient
+
+
+LOGGER = logging.getLogger(__name__)
+
+MATCH_RESULTS_TABLE = os.environ.get("MATCH_RESULTS_TABLE", "match_results")
+MATCH_RESULTS_BATCH_SIZE = int(os.environ.get("MATCH_RESULTS_BATCH_SIZE", "100"))
+LOT_KEY_COLUMN = os.environ.get("LOT_KEY_COLUMN", "id")
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    run_id text NOT NULL,
+    mode text NOT NULL,
+    record_key text NOT NULL,
+    mls_number text,
+    json_address text,
+    lot_key text,
+    lots_table_match text,
+    match_score double precision,
+    matched_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, mode, record_key)
+)
+"""
+
+UPSERT_SQL = """
+INSERT INTO {table} (
+    run_id, mode, record_key, mls_number, json_address, lot_key, lots_table_match, match_score
+) VALUES %s
+ON CONFLICT (run_id, mode, record_key) DO UPDATE SET
+    mls_number = EXCLUDED.mls_number,
+    json_address = EXCLUDED.json_address,
+    lot_key = EXCLUDED.lot_key,
+    lots_table_match = EXCLUDED.lots_table_match,
+    match_score = EXCLUDED.match_score,
+    matched_at = now()
+"""
+
+
+def new_run_id() -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"{stamp}-{uuid.uuid4().hex[:8]}"
+
+
+def sink_enabled() -> bool:
+    return os.environ.get("MATCH_RESULTS_SINK", "").lower() in {"1", "true", "yes"}
+
+
+class MatchResultsSink:
+    """Buffer match results and upsert them into Postgres in batches."""
+
+    def __init__(
+        self,
+        client: DatabaseClient,
+        run_id: str | None = None,
+        batch_size: int = MATCH_RESULTS_BATCH_SIZE,
+        table: str = MATCH_RESULTS_TABLE,
+    ):
+        self.client = client
+        self.run_id = run_id or os.environ.get("MATCH_RUN_ID") or new_run_id()
+        self.batch_size = max(1, batch_size)
+        self.table = table
+        self.pending: dict[tuple[str, str], tuple] = {}
+        self.written = 0
+        self._table_ready = False
+
+    def __enter__(self) -> "MatchResultsSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+    def ensure_table(self, cur) -> None:
+        if self._table_ready:
+            return
+        cur.execute(CREATE_TABLE_SQL.format(table=self.table))
+        self._table_ready = True
+
+    def add(
+        self,
+        mode: str,
+        record: dict[str, Any],
+        match: dict[str, Any] | None,
+    ) -> None:
+        address = (record.get("Address") or "").strip()
+        city = (record.get("City") or "").strip()
+        json_address = f"{address}, {city}" if address and city else address or city
+        mls_number = (record.get("MLS #") or "").strip() or None
+        record_key = mls_number or json_address
+        lot_key = None
+        formatted = None
+        score = None
+        if match:
+            formatted = match.get("formatted_address")
+            raw_key = match.get(LOT_KEY_COLUMN)
+            lot_key = str(raw_key) if raw_key is not None else formatted
+            score = match.get("match_score")
+        # Keyed like the table so a duplicate within one batch does not trip
+        # "ON CONFLICT DO UPDATE command cannot affect row a second time".
+        self.pending[(mode, record_key)] = (
+            self.run_id,
+            mode,
+            record_key,
+            mls_number,
+            json_address,
+            lot_key,
+            formatted,
+            score,
+        )
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self.pending:
+            return 0
+        from psycopg2.extras import execute_values
+
+        rows = list(self.pending.values())
+        with self.client.connect() as conn:
+            with conn.cursor() as cur:
+                self.ensure_table(cur)
+                execute_values(
+                    cur,
+                    UPSERT_SQL.format(table=self.table),
+                    rows,
+                    page_size=self.batch_size,
+                )
+            conn.commit()
+        self.pending.clear()
+        self.written += len(rows)
+        LOGGER.info(
+            "MatchResultsSink: flushed %s row(s) for run %s (%s total)",
+            len(rows),
+            self.run_id,
+            self.written,
+        )
+        return len(rows)
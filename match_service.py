@@ -0,0 +1,208 @@
+"""Resident lot-matching service for the n8n task runners.
+
+Matching from an n8n Code node pays for Python start-up, the module imports
+and a fresh TLS connection on every call. This service pays them once: it
+keeps a pooled database connection, the ZIP gazetteer and a lookup cache warm
+and answers batched match requests over local HTTP.
+
+Usage:
+    python match_service.py [--host 127.0.0.1] [--port 8765]
+
+Endpoints:
+    GET  /health  -> {"status": "ok", "requests": ..., "cache": {...}}
+    POST /match   {"mode": "improved", "records": [{"MLS #": ..., "Address": ..., "City": ...}]}
+                  -> {"results": [{"json_address": ..., "lots_table_match": ..., "match_score": ..., "lot": {...}}]}
+                  -> 503 {"error": ...} when a lot query fails; the failed lookup is not cached
+
+Reaching it from n8n: the runner image (Dockerfile.runners, PYTHONPATH
+/opt/runners/task-runner-python) does not ship this repository, so a Code node
+cannot import this module, and 127.0.0.1 inside the n8n-runner container is
+the container itself. Run the service where this checkout and psycopg2 are
+installed, bound to an address the runner can reach, e.g. on the Docker host:
+
+    python match_service.py --host 0.0.0.0 --port 8765
+
+and post from the Python Code node with the standard library (runner.config.json
+does not pass MATCH_SERVICE_URL through, so spell out the URL; docker-compose.yml
+maps host.docker.internal to the host gateway for n8n-runner):
+
+    import json, urllib.request
+    request = urllib.request.Request(
+        "http://host.docker.internal:8765/match",
+        data=json.dumps({"records": [item["json"] for item in _items]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    results = json.load(urllib.request.urlopen(request, timeout=60))["results"]
+
+``match_batch`` below is the same call for Python callers that can import this
+module.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.request
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+MATCH_SERVICE_HOST = os.environ.get("MATCH_SERVICE_HOST", "127.0.0.1")
+MATCH_SERVICE_PORT = int(os.environ.get("MATCH_SERVICE_PORT", "8765"))
+MATCH_SERVICE_URL = os.environ.get(
+    "MATCH_SERVICE_URL", f"http://{MATCH_SERVICE_HOST}:{MATCH_SERVICE_PORT}"
+)
+MATCH_SERVICE_POOL_SIZE = int(os.environ.get("MATCH_SERVICE_POOL_SIZE", "4"))
+MATCH_CACHE_SIZE = int(os.environ.get("MATCH_CACHE_SIZE", "50000"))
+CACHE_KEY_FIELDS = ("Address", "City", "Zip", "ZIP", "Zip Code", "PostalCode", "Postal Code", "Postal")
+
+
+def log(message: str):
+    print(f"[match-service] {message}")
+
+
+def match_batch(
+    records: list[dict[str, Any]],
+    mode: str | None = None,
+    url: str = MATCH_SERVICE_URL,
+    timeout: float = 60.0,
+) -> list[dict[str, Any]]:
+    """Client helper: post ``records`` to a running service and return its results."""
+
+    body = json.dumps({"mode": mode, "records": records}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/match", data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)["results"]
+
+
+class MatchEngine:
+    """Warm state shared by every request thread."""
+
+    def __init__(self, pool_size: int = MATCH_SERVICE_POOL_SIZE, cache_size: int = MATCH_CACHE_SIZE):
+        import lot_matching
+
+        self.lot_matching = lot_matching
+        lot_matching.get_db_client().enable_pool(1, pool_size)
+        lot_matching.get_zip_gazetteer()
+        # ThreadedConnectionPool raises instead of waiting once exhausted.
+        self.db_slots = threading.BoundedSemaphore(pool_size)
+        self.requests = 0
+        self.records = 0
+        self.failed_requests = 0
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, mode: str, key: tuple[tuple[str, str], ...]) -> dict[str, Any] | None:
+        # A failed query raises instead of returning [], so lru_cache never
+        # stores a database blip as a permanent "no match".
+        with self.db_slots, self.lot_matching.raising_query_errors():
+            return self.lot_matching.lot_lookup(dict(key), mode=mode)
+
+    def match_record(self, record: dict[str, Any], mode: str) -> dict[str, Any]:
+        key = tuple(
+            (name, str(record[name]).strip()) for name in CACHE_KEY_FIELDS if record.get(name)
+        )
+        match = self._cached_lookup(mode, key)
+        address = (record.get("Address") or "").strip()
+        city = (record.get("City") or "").strip()
+        return {
+            "mls_number": record.get("MLS #"),
+            "json_address": f"{address}, {city}" if address and city else address or city,
+            "lots_table_match": match.get("formatted_address") if match else None,
+            "match_score": match.get("match_score") if match else None,
+            "lot": match,
+        }
+
+    def match_batch(self, records: list[dict[str, Any]], mode: str | None) -> list[dict[str, Any]]:
+        resolved_mode = (mode or self.lot_matching.LOT_MATCH_MODE).lower()
+        self.requests += 1
+        self.records += len(records)
+        return [self.match_record(record, resolved_mode) for record in records]
+
+    def health(self) -> dict[str, Any]:
+        info = self._cached_lookup.cache_info()
+        return {
+            "status": "ok",
+            "requests": self.requests,
+            "records": self.records,
+            "failed_requests": self.failed_requests,
+            "cache": {"hits": info.hits, "misses": info.misses, "size": info.currsize},
+            "statements": self.lot_matching.get_db_client().timing_report(),
+        }
+
+
+class MatchRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    engine: MatchEngine
+
+    def send_json(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self.send_json(200, self.engine.health())
+            return
+        self.send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/match":
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        started = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            records = payload.get("records")
+            if not isinstance(records, list):
+                raise TypeError("records must be a JSON list of objects")
+            results = self.engine.match_batch(records, payload.get("mode"))
+        except (ValueError, TypeError, AttributeError) as exc:
+            self.send_json(400, {"error": str(exc)})
+            return
+        except self.engine.lot_matching.LotQueryError as exc:
+            self.engine.failed_requests += 1
+            self.send_json(503, {"error": f"lot query failed: {exc}"})
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.send_json(200, {"results": results, "elapsed_ms": round(elapsed_ms, 3)})
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+        log(format % args)
+
+
+def serve(host: str = MATCH_SERVICE_HOST, port: int = MATCH_SERVICE_PORT) -> None:
+    started = time.perf_counter()
+    MatchRequestHandler.engine = MatchEngine()
+    server = ThreadingHTTPServer((host, port), MatchRequestHandler)
+    log(
+        f"serve: Warm in {time.perf_counter() - started:.2f}s; listening on http://{host}:{port}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("serve: Shutting down.")
+    finally:
+        server.server_close()
+        MatchRequestHandler.engine.lot_matching.get_db_client().close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=MATCH_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=MATCH_SERVICE_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Audit the query plans of every lot lookup shape.
+
+Usage:
+    python plan_audit.py [--samples 20] [--output plan_audit.json]
+
+Every non-empty combination of the ILIKE fragment roles the improved cascade
+can emit (city, street, number, postal) plus the number/zip shapes is run with
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` for a sample of workflow listings.
+Portal exports carry no ZIP, so when neither the listing nor the ZIP gazetteer
+supplies one, a ``(zip, anumber)`` pair sampled from ``lots`` stands in for the
+postal and number_zip shapes; the report counts where each ZIP came from and
+lists any shape that still could not be built.
+The JSON report lists, per shape, the scan node types, estimated vs. actual
+rows, shared buffer hits/reads and execution time, and flags shapes that
+sequentially scan ``lots`` with a suggested index. The ``lots`` row estimate
+is recorded alongside so plan regressions can be tracked as the table grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import combinations
+from pathlib import Path
+from typing import Any
+
+from psycopg2.errors import QueryCanceled
+
+import lot_matching
+from listing_records import Listing, iter_listings
+
+
+DOWNLOAD_DIR = Path("downloads")
+ILIKE_ROLES = ("city", "street", "number", "postal")
+AUDIT_STATEMENT_TIMEOUT_MS = 60_000
+LOTS_SAMPLE_PERCENT = 1
+SCAN_SUFFIX = "Scan"
+NUMBER_ZIP_LABELS = {
+    "zip = %s": "zip",
+    "anumber = %s": "anumber",
+    "formatted_address ILIKE %s": "number_prefix",
+}
+
+
+def log(message: str):
+    print(f"[plan-audit] {message}")
+
+
+def sample_listings(limit: int) -> list[Listing]:
+    listings: list[Listing] = []
+    for listing in iter_listings(sorted(DOWNLOAD_DIR.glob("AUTO_SEARCH_V1*.csv"))):
+        listings.append(listing)
+        if len(listings) >= limit:
+            break
+    return listings
+
+
+def sample_zip_pairs(cur, limit: int) -> list[tuple[str, str]]:
+    """``(zip, anumber)`` pairs from a block sample of ``lots`` that fill the number_zip shape."""
+
+    cur.execute(
+        f"SELECT zip, anumber FROM lots TABLESAMPLE SYSTEM ({LOTS_SAMPLE_PERCENT})"
+        " WHERE zip IS NOT NULL AND anumber IS NOT NULL LIMIT %s",
+        [limit],
+    )
+    return [(str(row["zip"]), str(row["anumber"])) for row in cur.fetchall()]
+
+
+def enumerate_shapes(
+    listing: Listing,
+    sampled_pair: tuple[str, str] | None = None,
+) -> tuple[dict[str, list[tuple[str, Any]]], str]:
+    """Shape label -> fragments for one listing, and where its ZIP came from.
+
+    ``sampled_pair`` is a ``(zip, anumber)`` from ``lots`` used when the
+    listing has no explicit or inferred ZIP.
+    """
+
+    postal_code = lot_matching.extract_postal_code(listing)
+    inferred = lot_matching.infer_zip_codes(listing)
+    zip_code = postal_code or (inferred[0] if inferred else None)
+    house_number = lot_matching.extract_house_number_from_text(listing.address)
+    zip_source = "explicit" if postal_code else "inferred" if zip_code else "none"
+    if zip_code is None and sampled_pair is not None:
+        zip_code, house_number = sampled_pair
+        zip_source = "sampled"
+    roles = lot_matching.build_lot_fragments(listing.address, listing.city, zip_code)
+    available = {
+        "city": roles["city"][0] if roles["city"] else None,
+        "street": roles["street"],
+        "number": roles["number"],
+        "postal": roles["postal"],
+    }
+
+    shapes: dict[str, list[tuple[str, Any]]] = {}
+    for size in range(1, len(ILIKE_ROLES) + 1):
+        for combo in combinations(ILIKE_ROLES, size):
+            fragments = [available[role] for role in combo]
+            if all(fragments):
+                shapes["ilike:" + "+".join(combo)] = fragments
+
+    # number_zip_lot_lookup only queries once it has both a house number and a ZIP.
+    if house_number and zip_code:
+        fragments = lot_matching.build_number_zip_fragments(house_number, zip_code)
+        labels = [NUMBER_ZIP_LABELS[fragment] for fragment, _ in fragments]
+        shapes["number_zip:" + "+".join(labels)] = fragments
+    return shapes, zip_source
+
+
+def expected_shapes() -> list[str]:
+    labels = [
+        "ilike:" + "+".join(combo)
+        for size in range(1, len(ILIKE_ROLES) + 1)
+        for combo in combinations(ILIKE_ROLES, size)
+    ]
+    return labels + ["number_zip:zip+anumber"]
+
+
+def walk_plan(node: dict[str, Any], visit) -> None:
+    visit(node)
+    for child in node.get("Plans", []):
+        walk_plan(child, visit)
+
+
+def explain(cur, sql: str, params: list) -> dict[str, Any]:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    row = cur.fetchone()
+    plan_json = next(iter(row.values())) if isinstance(row, dict) else row[0]
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    return plan_json[0]
+
+
+def summarize_plan(explained: dict[str, Any]) -> dict[str, Any]:
+    scans: list[dict[str, Any]] = []
+
+    def visit(node: dict[str, Any]) -> None:
+        if node.get("Node Type", "").endswith(SCAN_SUFFIX):
+            scans.append(
+                {
+                    "node_type": node["Node Type"],
+                    "relation": node.get("Relation Name"),
+                    "index": node.get("Index Name"),
+                    "plan_rows": node.get("Plan Rows"),
+                    "actual_rows": node.get("Actual Rows"),
+                    "rows_removed_by_filter": node.get("Rows Removed by Filter", 0),
+                }
+            )
+
+    root = explained["Plan"]
+    walk_plan(root, visit)
+    return {
+        "scans": scans,
+        "shared_hit_blocks": root.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": root.get("Shared Read Blocks", 0),
+        "planning_ms": explained.get("Planning Time"),
+        "execution_ms": explained.get("Execution Time"),
+    }
+
+
+def suggest_index(label: str) -> str:
+    if label.startswith("number_zip"):
+        return "CREATE INDEX ON lots (zip, anumber)"
+    return (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm; "
+        "CREATE INDEX ON lots USING gin (formatted_address gin_trgm_ops)"
+    )
+
+
+def aggregate(
+    label: str,
+    sql: str,
+    runs: list[dict[str, Any]],
+    timeouts: int = 0,
+) -> dict[str, Any]:
+    scan_types = Counter(
+        f"{scan['node_type']}:{scan['relation'] or '-'}" for run in runs for scan in run["scans"]
+    )
+    lots_scans = [scan for run in runs for scan in run["scans"] if scan["relation"] == "lots"]
+    seq_scans = [scan for scan in lots_scans if scan["node_type"] == "Seq Scan"]
+    estimate_ratios = [
+        (scan["actual_rows"] or 0) / scan["plan_rows"]
+        for scan in lots_scans
+        if scan["plan_rows"]
+    ]
+    report = {
+        "shape": label,
+        "sql": sql,
+        "samples": len(runs),
+        "timeouts": timeouts,
+        "scan_types": dict(scan_types),
+        "indexes_used": sorted({scan["index"] for scan in lots_scans if scan["index"]}),
+        "plan_rows_mean": round(statistics.mean(s["plan_rows"] or 0 for s in lots_scans), 2)
+        if lots_scans
+        else None,
+        "actual_rows_mean": round(statistics.mean(s["actual_rows"] or 0 for s in lots_scans), 2)
+        if lots_scans
+        else None,
+        "actual_to_estimate_median": round(statistics.median(estimate_ratios), 4)
+        if estimate_ratios
+        else None,
+        "shared_hit_blocks": sum(run["shared_hit_blocks"] for run in runs),
+        "shared_read_blocks": sum(run["shared_read_blocks"] for run in runs),
+        "execution_ms_median": round(statistics.median(run["execution_ms"] for run in runs), 3)
+        if runs
+        else None,
+        "needs_index": bool(seq_scans) or timeouts > 0,
+    }
+    if report["needs_index"]:
+        report["suggested_index"] = suggest_index(label)
+    return report
+
+
+def audit(samples: int) -> dict[str, Any]:
+    listings = sample_listings(samples)
+    shapes: list[dict[str, Any]] = []
+    with lot_matching.get_db_client().connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SET statement_timeout TO {AUDIT_STATEMENT_TIMEOUT_MS}")
+            cur.execute("SELECT reltuples::bigint AS estimate FROM pg_class WHERE relname = 'lots'")
+            lots_estimate = next(iter(cur.fetchone().values()))
+            sampled_pairs = iter(sample_zip_pairs(cur, len(listings)))
+
+            queries: dict[str, list[tuple[str, list]]] = {}
+            zip_sources: Counter = Counter()
+            for listing in listings:
+                listing_shapes, zip_source = enumerate_shapes(listing)
+                if zip_source == "none":
+                    listing_shapes, zip_source = enumerate_shapes(listing, next(sampled_pairs, None))
+                zip_sources[zip_source] += 1
+                for label, fragments in listing_shapes.items():
+                    queries.setdefault(label, []).append(lot_matching.build_lot_query(fragments))
+            skipped = [label for label in expected_shapes() if label not in queries]
+            log(
+                f"audit: {len(queries)} shape(s) across {len(listings)} sample listing(s);"
+                f" ZIP sources {dict(zip_sources)}."
+            )
+            if skipped:
+                log(f"audit: No sample could fill {', '.join(skipped)}; not audited.")
+
+            for label in sorted(queries):
+                runs: list[dict[str, Any]] = []
+                timeouts = 0
+                for sql, params in queries[label]:
+                    cur.execute("SAVEPOINT plan_audit")
+                    try:
+                        runs.append(summarize_plan(explain(cur, sql, params)))
+                    except QueryCanceled:
+                        timeouts += 1
+                        cur.execute("ROLLBACK TO SAVEPOINT plan_audit")
+                shapes.append(aggregate(label, queries[label][0][0], runs, timeouts))
+                log(f"audit: {label} -> {shapes[-1]['scan_types']}")
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "lots_row_estimate": lots_estimate,
+        "lot_lookup_limit": lot_matching.LOT_LOOKUP_LIMIT,
+        "zip_sources": dict(zip_sources),
+        "skipped_shapes": skipped,
+        "shapes": shapes,
+        "needs_index": [shape["shape"] for shape in shapes if shape["needs_index"]],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = json.dumps(audit(args.samples), indent=2, default=str)
+    if args.output:
+        args.output.write_text(report + "\n", encoding="utf-8")
+        log(f"main: Wrote plan audit to {args.output}.")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Drive ``process_all_urls`` against the local fake portal and time each step.
+
+Usage:
+    python portal_benchmark.py [--urls 7] [--rows 300] [--assets 4] [--asset-kb 256]
+                               [--page-delay-ms 0] [--asset-delay-ms 0] [--export-delay-ms 0]
+                               [--passes 1] [--storage-state] [--disk-cache]
+
+Starts ``fake_portal`` on a free port, points the scraper at it through
+``URLS_JSON``, writes downloads into a temporary directory and prints JSON with,
+per pass, the per-URL step timings, the median/mean per step, the skipped
+steps, the portal request counts and the total wall time. ``--storage-state``
+and ``--disk-cache`` point ``BROWSER_STORAGE_STATE``/``BROWSER_CACHE_DIR`` into
+the temporary directory, shared by every pass, so a second pass shows what a
+warm session saves over the cold first one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import extract_hrefs
+from fake_portal import PortalConfig, portal_urls, start_portal
+
+
+def step_timings(summaries: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    samples: dict[str, list[float]] = {}
+    for summary in summaries:
+        for entry in summary["steps"]:
+            if "elapsed_ms" in entry:
+                samples.setdefault(entry["step"], []).append(entry["elapsed_ms"])
+    return {
+        step: {
+            "count": len(values),
+            "median_ms": round(statistics.median(values), 1),
+            "mean_ms": round(statistics.mean(values), 1),
+            "max_ms": round(max(values), 1),
+        }
+        for step, values in samples.items()
+    }
+
+
+def skipped_steps(summaries: list[dict[str, Any]]) -> dict[str, int]:
+    skipped: dict[str, int] = {}
+    for summary in summaries:
+        for entry in summary["steps"]:
+            if entry["status"] == "skipped":
+                skipped[entry["step"]] = skipped.get(entry["step"], 0) + 1
+    return skipped
+
+
+def run_benchmark(
+    config: PortalConfig,
+    url_count: int,
+    passes: int = 1,
+    storage_state: bool = False,
+    disk_cache: bool = False,
+) -> dict[str, Any]:
+    server, base_url = start_portal(config)
+    requests = server.RequestHandlerClass.requests
+    os.environ["URLS_JSON"] = json.dumps(portal_urls(base_url, url_count))
+    previous_state = extract_hrefs.BROWSER_STORAGE_STATE
+    previous_cache = extract_hrefs.BROWSER_CACHE_DIR
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="portal-bench-") as download_dir:
+            extract_hrefs.DOWNLOAD_DIR = Path(download_dir)
+            if storage_state:
+                extract_hrefs.BROWSER_STORAGE_STATE = Path(download_dir) / "storage_state.json"
+            if disk_cache:
+                extract_hrefs.BROWSER_CACHE_DIR = Path(download_dir) / "browser-cache"
+            for number in range(1, passes + 1):
+                requests.clear()
+                started = time.perf_counter()
+                summaries = asyncio.run(
+                    extract_hrefs.process_all_urls(extract_hrefs.resolve_urls())
+                )
+                wall = time.perf_counter() - started
+                results.append(
+                    {
+                        "pass": number,
+                        "succeeded": sum(
+                            1 for summary in summaries if summary["status"] == "success"
+                        ),
+                        "wall_seconds": round(wall, 3),
+                        "requests": dict(requests),
+                        "skipped": skipped_steps(summaries),
+                        "steps": step_timings(summaries),
+                        "per_url": [
+                            {
+                                "url": summary["url"],
+                                "status": summary["status"],
+                                "steps": {
+                                    entry["step"]: entry.get("elapsed_ms", entry["status"])
+                                    for entry in summary["steps"]
+                                    if "elapsed_ms" in entry or entry["status"] == "skipped"
+                                },
+                            }
+                            for summary in summaries
+                        ],
+                    }
+                )
+    finally:
+        server.shutdown()
+        os.environ.pop("URLS_JSON", None)
+        extract_hrefs.BROWSER_STORAGE_STATE = previous_state
+        extract_hrefs.BROWSER_CACHE_DIR = previous_cache
+
+    return {
+        "config": vars(config),
+        "urls": url_count,
+        "storage_state": storage_state,
+        "disk_cache": disk_cache,
+        "passes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=7)
+    parser.add_argument("--rows", type=int, default=PortalConfig.rows)
+    parser.add_argument("--assets", type=int, default=PortalConfig.assets)
+    parser.add_argument("--asset-kb", type=int, default=PortalConfig.asset_kb)
+    parser.add_argument("--page-delay-ms", type=int, default=0)
+    parser.add_argument("--asset-delay-ms", type=int, default=0)
+    parser.add_argument("--export-delay-ms", type=int, default=0)
+    parser.add_argument("--passes", type=int, default=1)
+    parser.add_argument("--storage-state", action="store_true")
+    parser.add_argument("--disk-cache", action="store_true")
+    args = parser.parse_args()
+
+    config = PortalConfig(
+        rows=args.rows,
+        assets=args.assets,
+        asset_kb=args.asset_kb,
+        page_delay_ms=args.page_delay_ms,
+        asset_delay_ms=args.asset_delay_ms,
+        export_delay_ms=args.export_delay_ms,
+    )
+    report = run_benchmark(
+        config,
+        args.urls,
+        max(1, args.passes),
+        storage_state=args.storage_state,
+        disk_cache=args.disk_cache,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
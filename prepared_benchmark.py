@@ -0,0 +1,95 @@
+"""Compare prepared vs. unprepared execution for every lot query shape.
+
+Usage:
+    python prepared_benchmark.py [--samples 50] [--repeat 3]
+
+Builds the query shapes ``fetch_lot_candidates`` and the number/zip lookup emit
+for a sample of workflow listings, then runs each sample query on a single
+pooled connection both as plain text and by name as a server-side prepared
+statement, and prints per-shape timings as JSON. Every sample is run once
+untimed first to warm the buffers, and the two paths swap order on each
+repeat so neither always runs against the other's warm cache. Both paths are
+timed over execute + fetch only; the one-off PREPARE cost is reported
+separately (``prepare``) along with the number of executions it takes to pay
+for itself.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import lot_matching
+from listing_records import Listing, iter_listings
+
+
+DOWNLOAD_DIR = Path("downloads")
+
+
+def sample_listings(limit: int) -> list[Listing]:
+    listings: list[Listing] = []
+    for listing in iter_listings(sorted(DOWNLOAD_DIR.glob("AUTO_SEARCH_V1*.csv"))):
+        listings.append(listing)
+        if len(listings) >= limit:
+            break
+    return listings
+
+
+def sample_queries(listings: list[Listing]) -> dict[str, list[tuple[str, list]]]:
+    """Statement name -> sample ``(sql, params)`` pairs for that shape."""
+
+    from database_client import statement_name
+
+    shapes: dict[str, list[tuple[str, list]]] = {}
+    for listing in listings:
+        postal_code = lot_matching.extract_postal_code(listing)
+        fragment_sets = lot_matching.build_lot_strategies(listing.address, listing.city, postal_code)
+        house_number = lot_matching.extract_house_number_from_text(listing.address)
+        for zip_code in lot_matching.infer_zip_codes(listing)[:1]:
+            fragment_sets.append(lot_matching.build_number_zip_fragments(house_number, zip_code))
+        for fragments in fragment_sets:
+            if not fragments:
+                continue
+            sql, params = lot_matching.build_lot_query(fragments)
+            shapes.setdefault(statement_name(sql), []).append((sql, params))
+    return shapes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = lot_matching.get_db_client()
+    client.enable_pool(1, 1)
+    shapes = sample_queries(sample_listings(args.samples))
+    # Untimed warm-up so neither path is the first to pull a sample's pages into cache.
+    for queries in shapes.values():
+        for sql, params in queries:
+            client.query(sql, params)
+    for queries in shapes.values():
+        for repeat in range(args.repeat):
+            for sql, params in queries:
+                # Alternate which path runs first on each repeat.
+                for prepare in (repeat % 2 == 1, repeat % 2 == 0):
+                    client.query_prepared(sql, params, prepare=prepare)
+
+    report = client.timing_report()
+    for name, timings in report.items():
+        timings["sql"] = shapes[name][0][0] if name in shapes else None
+        if "prepared" in timings and "unprepared" in timings:
+            unprepared_ms = timings["unprepared"]["mean_ms"]
+            prepared_ms = timings["prepared"]["mean_ms"]
+            timings["speedup"] = round(unprepared_ms / max(prepared_ms, 1e-6), 2)
+            if "prepare" in timings and unprepared_ms > prepared_ms:
+                timings["break_even_executions"] = round(
+                    timings["prepare"]["mean_ms"] / (unprepared_ms - prepared_ms), 1
+                )
+    print(json.dumps(report, indent=2))
+    client.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Append-only JSON-lines checkpoints for resumable scraper and matcher runs.
+
+Each line is ``{"kind": ..., "key": ..., "status": ..., ...}``; the last line
+for a ``(kind, key)`` wins. Lines are flushed and fsynced as they are written,
+so a crash loses at most the record in flight. Opening a checkpoint without
+``resume`` starts a fresh run and truncates the file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+CHECKPOINT_DIR = Path(os.environ.get("CHECKPOINT_DIR", "checkpoints"))
+
+
+class RunCheckpoint:
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self.entries: dict[tuple[str, str], dict[str, Any]] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and path.exists():
+            with path.open("rb") as fh:
+                data = fh.read()
+            # Drop a torn final line from a crash mid-write so the next record
+            # starts on a line of its own; everything before it is intact.
+            complete = data[: data.rfind(b"\n") + 1]
+            if len(complete) != len(data):
+                with path.open("r+b") as fh:
+                    fh.truncate(len(complete))
+            for line in complete.decode("utf-8").split("\n"):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.entries[(entry["kind"], entry["key"])] = entry
+        self._fh = path.open("a" if resume else "w", encoding="utf-8")
+
+    def __enter__(self) -> "RunCheckpoint":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def get(self, kind: str, key: str) -> dict[str, Any] | None:
+        return self.entries.get((kind, key))
+
+    def completed(self, kind: str, key: str) -> dict[str, Any] | None:
+        entry = self.get(kind, key)
+        return entry if entry and entry.get("status") == "ok" else None
+
+    def record(self, kind: str, key: str, status: str, **fields: Any) -> dict[str, Any]:
+        entry = {"kind": kind, "key": key, "status": status, **fields}
+        self._fh.write(json.dumps(entry, default=str) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.entries[(kind, key)] = entry
+        return entry
+
+    def counts(self, kind: str) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for (entry_kind, _), entry in self.entries.items():
+            if entry_kind == kind:
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
@@ -0,0 +1,280 @@
+"""Local ZIP gazetteer built from a snapshot of the lots table.
+
+The portal CSVs carry no ZIP column, so most listings cannot use the indexed
+``zip = %s AND anumber = %s`` lookup. The gazetteer maps a street key (the
+significant street tokens followed by the city tokens) to sorted house-number
+ranges and the ZIP each range belongs to, so a ZIP can be inferred before the
+query is issued.
+
+Usage:
+    python zip_gazetteer.py build [--snapshot lots.csv] [--output PATH]
+    python zip_gazetteer.py report [--gazetteer PATH]
+
+``build`` streams ``anumber``, ``zip`` and ``formatted_address`` from the lots
+table (or from a CSV export of it) and writes a gzipped JSON file. ``report``
+runs the workflow CSVs through the gazetteer and prints how many listings move
+onto the indexed number/zip path. The number_zip mode uses the gazetteer
+whenever the file exists; improved mode only tries it first when
+LOT_IMPROVED_ZIP_PREPASS=1, and tags such matches ``matched_via: number_zip``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import os
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Iterable
+
+from lot_matching import (
+    UNIT_TOKENS,
+    extract_postal_code,
+    extract_street_tokens,
+    extract_zip_from_text,
+    significant_street_tokens,
+    tokenize,
+)
+
+
+GAZETTEER_VERSION = 1
+DEFAULT_GAZETTEER_PATH = Path(os.environ.get("ZIP_GAZETTEER_PATH", "zip_gazetteer.json.gz"))
+SNAPSHOT_FETCH_SIZE = 20_000
+
+
+def log(message: str):
+    print(f"[gazetteer] {message}")
+
+
+def normalize_saint(tokens: list[str]) -> list[str]:
+    return ["st" if token == "saint" else token for token in tokens]
+
+
+def gazetteer_key(street_tokens: list[str], city_tokens: list[str]) -> str | None:
+    tokens = significant_street_tokens(normalize_saint(street_tokens + city_tokens))
+    return " ".join(tokens) or None
+
+
+def listing_key(address: str | None, city: str | None) -> str | None:
+    return gazetteer_key(extract_street_tokens(address), tokenize(city))
+
+
+def parse_house_number(value: Any) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    digits = ""
+    for ch in str(value).strip():
+        if not ch.isdigit():
+            break
+        digits += ch
+    return int(digits) if digits else None
+
+
+def drop_unit_designators(tokens: list[str]) -> list[str]:
+    kept: list[str] = []
+    skip_next = False
+    for token in tokens:
+        if skip_next:
+            skip_next = False
+            continue
+        if token in UNIT_TOKENS:
+            skip_next = True
+            continue
+        if token.startswith("#"):
+            continue
+        kept.append(token)
+    return kept
+
+
+def lot_key(formatted_address: str | None) -> str | None:
+    """Key a lots row from ``"<number> <street> <city>, MN <zip>"``."""
+
+    if not formatted_address:
+        return None
+    street_and_city = formatted_address.rsplit(",", 1)[0]
+    tokens = drop_unit_designators(tokenize(street_and_city))
+    if tokens and tokens[0][:1].isdigit():
+        tokens = tokens[1:]
+    if not tokens:
+        return None
+    # The street/city boundary is not delimited in formatted_address, so the
+    # whole tail is treated as street tokens; listing keys are built the same way.
+    return gazetteer_key(tokens, [])
+
+
+class ZipGazetteer:
+    """Street key -> sorted ``(lo, hi, zip)`` house-number runs."""
+
+    def __init__(self, entries: dict[str, tuple[list[int], list[int], list[str]]]):
+        self.entries = entries
+        self.stats = {"explicit": 0, "inferred": 0, "unresolved": 0}
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[str, int, str]]) -> "ZipGazetteer":
+        grouped: dict[str, set[tuple[int, str]]] = {}
+        for key, number, zip_code in pairs:
+            grouped.setdefault(key, set()).add((number, zip_code))
+
+        entries: dict[str, tuple[list[int], list[int], list[str]]] = {}
+        for key, points in grouped.items():
+            los: list[int] = []
+            his: list[int] = []
+            zips: list[str] = []
+            for number, zip_code in sorted(points):
+                if zips and zips[-1] == zip_code:
+                    his[-1] = number
+                    continue
+                los.append(number)
+                his.append(number)
+                zips.append(zip_code)
+            entries[key] = (los, his, zips)
+        return cls(entries)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_GAZETTEER_PATH) -> "ZipGazetteer":
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if payload.get("version") != GAZETTEER_VERSION:
+            raise ValueError(
+                f"ZipGazetteer.load: unsupported gazetteer version {payload.get('version')!r}"
+            )
+        entries = {
+            key: ([run[0] for run in runs], [run[1] for run in runs], [run[2] for run in runs])
+            for key, runs in payload["entries"].items()
+        }
+        return cls(entries)
+
+    def save(self, path: Path = DEFAULT_GAZETTEER_PATH) -> Path:
+        payload = {
+            "version": GAZETTEER_VERSION,
+            "entries": {
+                key: [list(run) for run in zip(los, his, zips)]
+                for key, (los, his, zips) in self.entries.items()
+            },
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+        return path
+
+    def candidate_zips(self, address: str | None, city: str | None) -> list[str]:
+        key = listing_key(address, city)
+        number = parse_house_number((address or "").split()[0] if address else None)
+        if not key or number is None or key not in self.entries:
+            return []
+        los, his, zips = self.entries[key]
+        if len(set(zips)) == 1:
+            return [zips[0]]
+
+        index = bisect_right(los, number) - 1
+        containing = [
+            zips[position]
+            for position in (index - 1, index, index + 1)
+            if 0 <= position < len(los) and los[position] <= number <= his[position]
+        ]
+        if not containing:
+            # Gap between runs (or past either end): try the neighbouring ZIPs.
+            containing = [
+                zips[position] for position in (index, index + 1) if 0 <= position < len(los)
+            ]
+        return list(dict.fromkeys(containing))
+
+    def resolve(self, record: dict[str, Any]) -> tuple[list[str], str]:
+        """Return ``(zips, source)`` for a listing and count how it was resolved."""
+
+        postal_code = extract_postal_code(record)
+        if postal_code:
+            self.stats["explicit"] += 1
+            return [postal_code], "explicit"
+        zips = self.candidate_zips(record.get("Address"), record.get("City"))
+        if zips:
+            self.stats["inferred"] += 1
+            return zips, "inferred"
+        self.stats["unresolved"] += 1
+        return [], "unresolved"
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def iter_snapshot_rows(snapshot: Path | None) -> Iterable[dict[str, Any]]:
+    if snapshot is not None:
+        log(f"iter_snapshot_rows: Reading lots snapshot from {snapshot}.")
+        with snapshot.open("r", newline="", encoding="utf-8-sig") as fh:
+            yield from csv.DictReader(fh)
+        return
+
+    from lot_matching import get_db_client
+
+    log("iter_snapshot_rows: Streaming lots snapshot from the database.")
+    with get_db_client().connect() as conn:
+        with conn.cursor(name="zip_gazetteer_snapshot") as cur:
+            cur.itersize = SNAPSHOT_FETCH_SIZE
+            cur.execute(
+                "SELECT anumber, zip, formatted_address FROM lots"
+                " WHERE anumber IS NOT NULL AND formatted_address IS NOT NULL"
+            )
+            yield from cur
+
+
+def iter_gazetteer_pairs(rows: Iterable[dict[str, Any]]) -> Iterable[tuple[str, int, str]]:
+    for row in rows:
+        formatted = row.get("formatted_address")
+        key = lot_key(formatted)
+        number = parse_house_number(row.get("anumber"))
+        zip_code = (str(row.get("zip") or "")).strip()[:5] or extract_zip_from_text(formatted)
+        if key and number is not None and zip_code:
+            yield key, number, zip_code
+
+
+def build(snapshot: Path | None, output: Path) -> ZipGazetteer:
+    gazetteer = ZipGazetteer.from_pairs(iter_gazetteer_pairs(iter_snapshot_rows(snapshot)))
+    gazetteer.save(output)
+    runs = sum(len(los) for los, _, _ in gazetteer.entries.values())
+    log(f"build: Wrote {len(gazetteer)} street key(s) / {runs} range(s) to {output}.")
+    return gazetteer
+
+
+def report(gazetteer: ZipGazetteer, records: list[dict[str, Any]]) -> dict[str, Any]:
+    ambiguous = 0
+    for record in records:
+        zips, source = gazetteer.resolve(record)
+        if source == "inferred" and len(zips) > 1:
+            ambiguous += 1
+    total = len(records)
+    indexed = gazetteer.stats["explicit"] + gazetteer.stats["inferred"]
+    return {
+        "total": total,
+        **gazetteer.stats,
+        "ambiguous": ambiguous,
+        "indexed_path": indexed,
+        "moved_to_indexed_path": gazetteer.stats["inferred"],
+        "indexed_rate": round(indexed / total, 4) if total else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build")
+    build_parser.add_argument("--snapshot", type=Path, default=None)
+    build_parser.add_argument("--output", type=Path, default=DEFAULT_GAZETTEER_PATH)
+    report_parser = subparsers.add_parser("report")
+    report_parser.add_argument("--gazetteer", type=Path, default=DEFAULT_GAZETTEER_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.snapshot, args.output)
+        return
+
+    from fuzzyMatchInvestigator import load_workflow_records
+
+    summary = report(ZipGazetteer.load(args.gazetteer), load_workflow_records())
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()